@@ -1,6 +1,15 @@
+import ast
+import importlib
+import io
+import json
+import math
+import subprocess
+import sys
+import tempfile
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
-from unittest.mock import MagicMock, patch
+from pathlib import Path
+from unittest.mock import MagicMock, PropertyMock, patch
 
 import pandas as pd
 
@@ -10,11 +19,18 @@ from django.urls import reverse
 
 from dcf_app import views
 from dcf_app.models import AnalysisRecord, WatchlistGroup, WatchlistItem
-from dcf_core import insider_trading
+from dcf_core import empresa, finanzas, finnhub, insider_trading, marketaux, search
 from dcf_core.DCF_Main import ejecutar_dcf
 from dcf_core.company_stage import detect_company_stage
-from dcf_core.finanzas import seleccionar_metodo_crecimiento
-from dcf_core.fmp import FMPClientError
+from dcf_core.finanzas import (
+    calcular_valor_intrinseco,
+    mc_valor_intrinseco,
+    proyectar_fcf,
+    seleccionar_metodo_crecimiento,
+)
+from dcf_core.fmp import FMPClient, FMPClientError
+from dcf_core.http_cache import FileCache
+from dcf_core.utils import ttl_cache
 from dcf_core.multi_model_valuation import calcular_score_final, _modelo_reverse_dcf, run_all_models
 
 
@@ -944,3 +960,523 @@ class AutomaticAnalysisTests(SimpleTestCase):
             "Se utilizó Yfinance porque Financial Modeling Prep devolvió un error",
             resultado["mensaje_fuente"],
         )
+
+
+class NewsProviderTests(SimpleTestCase):
+    def test_marketaux_batch_splits_articles_by_mentioned_symbol(self) -> None:
+        payload = [
+            {
+                "title": "Apple and Microsoft rally",
+                "url": "https://example.com/a",
+                "published_at": "2024-05-02T10:00:00Z",
+                "entities": [{"symbol": "AAPL"}, {"symbol": "MSFT"}],
+            },
+            {
+                "title": "Microsoft earnings",
+                "url": "https://example.com/b",
+                "published_at": "2024-05-03T10:00:00Z",
+                "entities": [{"symbol": "MSFT"}],
+            },
+            {"title": "Sin enlace", "entities": [{"symbol": "AAPL"}]},
+        ]
+
+        with patch.dict("os.environ", {"MARKETAUX_API_KEY": "test"}), patch.object(
+            marketaux, "_solicitar_noticias", return_value=payload
+        ) as mock_solicitar:
+            result = marketaux.obtener_noticias_marketaux_batch(["aapl", "MSFT", "NVDA"])
+
+        mock_solicitar.assert_called_once()
+        self.assertEqual(mock_solicitar.call_args.args[0]["symbols"], "AAPL,MSFT,NVDA")
+        self.assertEqual([n.url for n in result["AAPL"]], ["https://example.com/a"])
+        self.assertEqual(
+            [n.url for n in result["MSFT"]],
+            ["https://example.com/b", "https://example.com/a"],
+        )
+        self.assertEqual(result["NVDA"], [])
+
+    def test_finnhub_closes_response_on_rate_limit(self) -> None:
+        respuesta = MagicMock(status_code=429)
+
+        with patch.dict("os.environ", {"FINNHUB_API_KEY": "test"}), patch.object(
+            finnhub._SESSION, "get", return_value=respuesta
+        ), patch.object(
+            finnhub._NEWS_CACHE, "get_or_fetch", side_effect=lambda url, params, ttl, fetch: fetch()
+        ):
+            with self.assertRaises(finnhub.FinnhubError):
+                finnhub.obtener_noticias_finnhub("AAPL")
+        respuesta.close.assert_called_once()
+
+    def test_yfinance_caches_are_bounded(self) -> None:
+        with patch.object(empresa._TICKER_CACHE, "maxsize", 2), patch.object(empresa.yf, "Ticker") as mock_ticker:
+            empresa._TICKER_CACHE.clear()
+            for simbolo in ("aapl", "MSFT", "NVDA", "AAPL"):
+                empresa.obtener_ticker_yf(simbolo)
+            self.assertEqual(len(empresa._TICKER_CACHE), 2)
+            # AAPL fue desalojado por LRU y se vuelve a crear
+            self.assertEqual(mock_ticker.call_count, 4)
+            empresa.obtener_ticker_yf(" nvda ")
+            self.assertEqual(mock_ticker.call_count, 4)
+        empresa._TICKER_CACHE.clear()
+
+    def test_finnhub_wraps_read_errors_mid_stream(self) -> None:
+        import requests
+        from urllib3.exceptions import ProtocolError
+
+        respuesta = MagicMock(status_code=200)
+        respuesta.raw.read.side_effect = ProtocolError("Connection broken")
+        type(respuesta).content = PropertyMock(side_effect=requests.exceptions.ChunkedEncodingError())
+
+        with patch.dict("os.environ", {"FINNHUB_API_KEY": "test"}), patch.object(
+            finnhub._SESSION, "get", return_value=respuesta
+        ), patch.object(
+            finnhub._NEWS_CACHE, "get_or_fetch", side_effect=lambda url, params, ttl, fetch: fetch()
+        ):
+            with self.assertRaises(finnhub.FinnhubError):
+                finnhub.obtener_noticias_finnhub("AAPL")
+        respuesta.close.assert_called_once()
+
+    def test_news_pipeline_is_cancelled_when_valuation_fails(self) -> None:
+        fake_empresa = MagicMock()
+        fake_empresa.info = {"longName": "Test Corp", "currency": "USD"}
+        cancelado = empresa.threading.Event()
+
+        with patch.object(empresa.threading, "Event", return_value=cancelado), patch.object(
+            empresa, "_pipeline_noticias", return_value=([], set(), None, None, None)
+        ), patch.object(empresa, "obtener_historial_yf", side_effect=RuntimeError("yfinance caído")):
+            with self.assertRaises(RuntimeError):
+                empresa.analizar_empresa("TEST", empresa_yf=fake_empresa)
+
+        self.assertTrue(cancelado.is_set())
+
+    def test_analizar_empresas_keeps_other_results_when_one_ticker_fails(self) -> None:
+        def analizar(ticker, **_kwargs):
+            if ticker == "DLST":
+                raise ValueError("sin datos en yfinance")
+            return {"nombre": ticker}
+
+        with patch.object(empresa, "obtener_noticias_marketaux_batch", return_value={}), patch.object(
+            empresa, "precargar_tickers"
+        ), patch.object(empresa, "analizar_empresa", side_effect=analizar):
+            resultado = empresa.analizar_empresas(["AAPL", "DLST", "MSFT"])
+
+        self.assertEqual(list(resultado), ["AAPL", "DLST", "MSFT"])
+        self.assertEqual(resultado["AAPL"], {"nombre": "AAPL"})
+        self.assertEqual(resultado["DLST"], {"error": "sin datos en yfinance"})
+        self.assertEqual(resultado["MSFT"], {"nombre": "MSFT"})
+
+    def test_analizar_empresas_falls_back_per_ticker_only_without_batch_hits(self) -> None:
+        item = marketaux.MarketauxNewsItem(
+            title="t", url="https://example.com/a", source=None,
+            summary=None, image=None, published_at=None,
+        )
+        batch = {"AAPL": [item] * empresa.MAX_NEWS_ITEMS, "MSFT": [item], "NVDA": []}
+
+        with patch.object(empresa, "obtener_noticias_marketaux_batch", return_value=batch), patch.object(
+            empresa, "precargar_tickers"
+        ), patch.object(empresa, "analizar_empresa", return_value={}) as mock_analizar:
+            empresa.analizar_empresas(["AAPL", "MSFT", "NVDA"])
+
+        precargadas = {
+            c.args[0]: c.kwargs["noticias_marketaux"] for c in mock_analizar.call_args_list
+        }
+        self.assertEqual(len(precargadas["AAPL"]), empresa.MAX_NEWS_ITEMS)
+        # Con pocas coincidencias se usan igual: no se repite la petición por ticker
+        self.assertEqual(precargadas["MSFT"], [item])
+        self.assertIsNone(precargadas["NVDA"])
+
+
+class HttpCacheTests(SimpleTestCase):
+    def test_file_cache_reuses_payload_until_ttl_expires(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = FileCache("test", root=Path(tmp))
+            fetch = MagicMock(return_value={"observations": [{"value": "4.10"}]})
+            url = "https://example.com/series"
+
+            primero = cache.get_or_fetch(url, {"series_id": "DGS10", "api_key": "a"}, 60, fetch)
+            # La credencial no forma parte de la clave
+            segundo = cache.get_or_fetch(url, {"series_id": "DGS10", "api_key": "b"}, 60, fetch)
+            self.assertEqual(primero, segundo)
+            fetch.assert_called_once()
+
+            cache.get_or_fetch(url, {"series_id": "DGS10"}, 0, fetch)
+            self.assertEqual(fetch.call_count, 2)
+
+    def test_ttl_cache_normalizes_key_and_returns_copies(self) -> None:
+        fuente = MagicMock(return_value=[1, 2])
+
+        @ttl_cache(maxsize=2, ttl=60, clave=lambda ticker: ticker.upper().strip())
+        def historico(ticker):
+            return fuente(ticker)
+
+        primero = historico("aapl")
+        primero.append(3)
+        self.assertEqual(historico(" AAPL "), [1, 2])
+        fuente.assert_called_once_with("aapl")
+
+        historico.cache_clear()
+        historico("AAPL")
+        self.assertEqual(fuente.call_count, 2)
+
+
+def _proyectar_fcf_referencia(fcf_actual, tasa, años=5):
+    """Bucle escalar original de proyectar_fcf (referencia para las rutas NumPy y numba)."""
+    proyecciones = []
+    for i in range(años):
+        if i == 0:
+            fcf = fcf_actual * (1 + tasa) if fcf_actual > 0 else (-fcf_actual * tasa) + fcf_actual
+        else:
+            prev = proyecciones[-1]
+            prev_prev = fcf_actual if i == 1 else proyecciones[-2]
+            fcf = prev * (1 + tasa) if prev > 0 else ((prev - prev_prev) * (1 + tasa)) + prev
+        proyecciones.append(fcf)
+    return proyecciones
+
+
+def _valor_intrinseco_referencia(flujos, wacc, crecimiento_perpetuo=0.025):
+    """Fórmula escalar original de calcular_valor_intrinseco."""
+    if not flujos or wacc is None or wacc <= 0:
+        return None
+    vp_fcf = sum(fcf / ((1 + wacc) ** i) for i, fcf in enumerate(flujos, start=1))
+    crecimiento = min(crecimiento_perpetuo, wacc - 0.005) if wacc > crecimiento_perpetuo else None
+    if crecimiento is None or crecimiento < 0:
+        return None
+    residual = (flujos[-1] * (1 + crecimiento)) / (wacc - crecimiento)
+    return vp_fcf + residual / ((1 + wacc) ** len(flujos))
+
+
+class MonteCarloValuationTests(SimpleTestCase):
+    TASAS = [0.08, -0.2, 0.15, 0.05, -1.5]
+    WACCS = [0.09, 0.11, 0.02, 0.0, 0.1]
+
+    def _rutas(self) -> list:
+        """Ruta NumPy siempre; la de numba además si está instalado."""
+        return [False, True] if finanzas._HAS_NUMBA else [False]
+
+    def test_projection_and_value_match_scalar_reference(self) -> None:
+        for con_numba in self._rutas():
+            with self.subTest(numba=con_numba), patch.object(finanzas, "_HAS_NUMBA", con_numba):
+                for fcf_actual in (1_000.0, -250.0, 0.0):
+                    for tasa in self.TASAS:
+                        for años in (0, 1, 5):
+                            esperado = _proyectar_fcf_referencia(fcf_actual, tasa, años)
+                            obtenido = finanzas.proyectar_fcf(fcf_actual, tasa, años)
+                            self.assertEqual(len(obtenido), len(esperado))
+                            for a, b in zip(obtenido, esperado):
+                                self.assertAlmostEqual(a, b, places=6)
+
+                    flujos = _proyectar_fcf_referencia(fcf_actual, tasa)
+                    for wacc in self.WACCS:
+                        esperado = _valor_intrinseco_referencia(flujos, wacc, finanzas.G_TERMINAL)
+                        obtenido = finanzas.calcular_valor_intrinseco(flujos, wacc)
+                        if esperado is None:
+                            self.assertIsNone(obtenido)
+                        else:
+                            self.assertAlmostEqual(obtenido, esperado, places=6)
+
+    def test_mc_matches_scalar_reference_on_each_path(self) -> None:
+        for con_numba in self._rutas():
+            with self.subTest(numba=con_numba), patch.object(finanzas, "_HAS_NUMBA", con_numba):
+                for fcf_actual in (1_000.0, -250.0):
+                    valores = finanzas.mc_valor_intrinseco(fcf_actual, self.TASAS, self.WACCS)
+                    for valor, tasa, wacc in zip(valores, self.TASAS, self.WACCS):
+                        esperado = _valor_intrinseco_referencia(
+                            _proyectar_fcf_referencia(fcf_actual, tasa), wacc, finanzas.G_TERMINAL
+                        )
+                        if esperado is None:
+                            self.assertTrue(math.isnan(valor))
+                        else:
+                            self.assertAlmostEqual(valor, esperado, places=6)
+
+    def test_mc_valor_intrinseco_matches_scalar_dcf_per_scenario(self) -> None:
+        tasas = [0.08, -0.2, 0.15, 0.05]
+        waccs = [0.09, 0.11, 0.02, 0.0]
+
+        for fcf_actual in (1_000.0, -250.0):
+            valores = mc_valor_intrinseco(fcf_actual, tasas, waccs)
+            for valor, tasa, wacc in zip(valores, tasas, waccs):
+                esperado = calcular_valor_intrinseco(proyectar_fcf(fcf_actual, tasa), wacc)
+                if esperado is None:
+                    self.assertTrue(math.isnan(valor))
+                else:
+                    self.assertAlmostEqual(valor, esperado, places=6)
+
+
+class FMPClientTests(SimpleTestCase):
+    def tearDown(self) -> None:
+        FMPClient.clear_cache()
+
+    def test_statement_methods_are_memoized_per_arguments(self) -> None:
+        cliente = FMPClient(api_key="test")
+        payload = [{"calendarYear": "2024", "revenue": 100.0}]
+
+        with patch.object(FMPClient, "_request", return_value=payload) as mock_request:
+            primero = cliente.get_income_statements("AAPL", limit=5)
+            primero.append({"calendarYear": "1999"})
+            segundo = cliente.get_income_statements("AAPL", limit=5)
+            cliente.get_income_statements("MSFT", limit=5)
+
+            self.assertEqual(segundo, payload)
+            self.assertEqual(mock_request.call_count, 2)
+
+            FMPClient.clear_cache()
+            cliente.get_income_statements("AAPL", limit=5)
+            self.assertEqual(mock_request.call_count, 3)
+
+    def test_memo_normalizes_ticker_and_copies_statements(self) -> None:
+        cliente = FMPClient(api_key="test")
+        payload = [{"calendarYear": "2024", "revenue": 100.0}]
+
+        with patch.object(FMPClient, "_request", return_value=payload) as mock_request:
+            primero = cliente.get_income_statements("aapl")
+            primero[0]["revenue"] = -1.0
+            segundo = cliente.get_income_statements(ticker=" AAPL ", limit=5)
+
+            self.assertEqual(segundo, [{"calendarYear": "2024", "revenue": 100.0}])
+            mock_request.assert_called_once()
+
+    def test_memo_is_bounded(self) -> None:
+        cliente = FMPClient(api_key="test")
+        with patch.object(FMPClient._MEMO, "maxsize", 2), patch.object(
+            FMPClient, "_request", return_value=[]
+        ):
+            for ticker in ("AAPL", "MSFT", "NVDA"):
+                cliente.get_income_statements(ticker)
+            self.assertEqual(len(FMPClient._MEMO), 2)
+
+    def test_truncated_stream_raises_client_error(self) -> None:
+        from dcf_core import fmp
+
+        if not fmp._HAS_IJSON:
+            self.skipTest("ijson no está instalado: no hay lectura en streaming")
+        respuesta = MagicMock()
+        respuesta.raw = io.BytesIO(b'[{"calendarYear": "2024", "freeCashFlow": 1.0}, {"calendarYe')
+        sesion = MagicMock()
+        sesion.get.return_value = respuesta
+        cliente = FMPClient(api_key="test", session=sesion)
+
+        with patch.dict("os.environ", {"FMP_CACHE_DISABLE": "1"}):
+            with self.assertRaises(FMPClientError):
+                cliente.get_free_cash_flow_history("AAPL", limit=5)
+        respuesta.close.assert_called()
+
+    def test_extraer_año_from_calendar_year_or_date(self) -> None:
+        from dcf_core.fmp import _extraer_año
+
+        self.assertEqual(_extraer_año({"calendarYear": 2024, "date": "2023-12-31"}), 2024)
+        self.assertEqual(_extraer_año({"calendarYear": " 2023 "}), 2023)
+        self.assertEqual(_extraer_año({"calendarYear": 2022.0}), 2022)
+        # calendarYear ausente, vacío o no numérico: año desde "date"
+        self.assertEqual(_extraer_año({"date": "2021-09-30"}), 2021)
+        self.assertEqual(_extraer_año({"calendarYear": "", "date": "20200630"}), 2020)
+        self.assertEqual(_extraer_año({"calendarYear": "FY24", "date": "2024-06-30"}), 2024)
+        self.assertIsNone(_extraer_año({"date": "sin fecha"}))
+        self.assertIsNone(_extraer_año({}))
+        # Fuera del camino rápido se conserva la semántica de int()
+        self.assertEqual(_extraer_año({"calendarYear": "+2023"}), 2023)
+        self.assertEqual(_extraer_año({"date": "２０２４-01-01"}), 2024)
+
+    def test_request_closes_response_on_http_error(self) -> None:
+        import requests
+
+        respuesta = MagicMock()
+        respuesta.raise_for_status.side_effect = requests.HTTPError("503 Server Error")
+        sesion = MagicMock()
+        sesion.get.return_value = respuesta
+        cliente = FMPClient(api_key="test", session=sesion)
+
+        with patch.dict("os.environ", {"FMP_CACHE_DISABLE": "1"}):
+            with self.assertRaises(FMPClientError):
+                cliente._request("stable/income-statement", {"symbol": "AAPL"}, tope=1)
+        respuesta.close.assert_called_once()
+
+    def test_importing_fmp_does_not_load_finanzas_or_numpy(self) -> None:
+        codigo = (
+            "import sys, dcf_core.fmp; "
+            "print(sorted(m for m in ('dcf_core.finanzas', 'numpy', 'numba') if m in sys.modules))"
+        )
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo],
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(salida.stdout.strip(), "[]")
+
+    def test_module_defines_each_name_once(self) -> None:
+        # Un bloque duplicado por concatenación dejaría dos FMPClient: el segundo
+        # ocultaría al primero y los parches de los tests irían al equivocado.
+        modulo = importlib.import_module("dcf_core.fmp")
+        self.assertIs(modulo.FMPClient, FMPClient)
+        self.assertEqual(FMPClient.__qualname__, "FMPClient")
+
+        arbol = ast.parse(Path(modulo.__file__).read_text(encoding="utf-8"))
+        nombres = [
+            nodo.name
+            for nodo in arbol.body
+            if isinstance(nodo, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        ]
+        duplicados = sorted({n for n in nombres if nombres.count(n) > 1})
+        self.assertEqual(duplicados, [])
+
+    def test_cash_flow_cache_false_forces_refresh(self) -> None:
+        cliente = FMPClient(api_key="test")
+        viejo = [{"calendarYear": "2023", "freeCashFlow": 1.0}]
+        nuevo = [{"calendarYear": "2024", "freeCashFlow": 2.0}]
+
+        with patch.object(FMPClient, "_request", side_effect=[viejo, nuevo]) as mock_request:
+            self.assertEqual(cliente.get_cash_flow_statements("AAPL", limit=5), viejo)
+            self.assertEqual(cliente.get_cash_flow_statements("AAPL", limit=5, cache=False), nuevo)
+            # El refresco reemplaza la entrada del memo usada por las llamadas normales
+            self.assertEqual(cliente.get_cash_flow_statements("AAPL", limit=5), nuevo)
+
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertIs(mock_request.call_args.args[2], False)
+
+
+class CompanySearchTests(SimpleTestCase):
+    def setUp(self) -> None:
+        search.search_companies.cache_clear()
+
+    def test_local_search_matches_full_scan(self) -> None:
+        # Un carácter: símbolo (V, VZ) o nombre (NVIDIA), en el orden del índice
+        self.assertEqual([r.symbol for r in search._search_locally("v")], ["NVDA", "V", "VZ"])
+        # Dos caracteres y por nombre, sin distinguir mayúsculas
+        self.assertEqual([r.symbol for r in search._search_locally("Ap")], ["AAPL"])
+        self.assertEqual([r.symbol for r in search._search_locally("coca")], ["KO"])
+        self.assertEqual(search._search_locally("zz"), [])
+
+        for query in ("v", "ap", "In", "nyse", "coca", "nvda", " ", "q"):
+            self.assertEqual(
+                search._search_locally(query),
+                search._filter_indexed(search._LOCAL_INDEX, query),
+                query,
+            )
+
+    def test_yahoo_single_pass_filters_empty_symbols_duplicates_and_non_matches(self) -> None:
+        payload = {"quotes": [
+            {"symbol": "aapl", "shortname": "Apple Inc.", "exchDisp": "NASDAQ", "quoteType": "EQUITY"},
+            {"symbol": "", "shortname": "Apple sin símbolo", "quoteType": "EQUITY"},
+            {"symbol": "APLY", "shortname": "YieldMax Apple Option Income ETF", "quoteType": "ETF"},
+            {"symbol": "AAPL", "shortname": "Apple duplicado", "quoteType": "EQUITY"},
+            {"symbol": "APLE", "longname": "Apple Hospitality REIT", "typeDisp": "Equity"},
+            {"symbol": "MSFT", "shortname": "Microsoft", "quoteType": "EQUITY"},
+        ]}
+        respuesta = MagicMock(content=json.dumps(payload).encode())
+
+        with patch.object(search._YAHOO_SESSION, "get", return_value=respuesta):
+            resultados = search._search_with_yahoo("apple", 10)
+
+        self.assertEqual(
+            resultados,
+            [
+                search.CompanySearchResult("AAPL", "Apple Inc.", "NASDAQ", "EQUITY"),
+                search.CompanySearchResult("APLY", "YieldMax Apple Option Income ETF", None, "ETF"),
+                search.CompanySearchResult("APLE", "Apple Hospitality REIT", None, "Equity"),
+            ],
+        )
+
+    def test_yahoo_is_only_queried_when_fmp_has_no_matches(self) -> None:
+        apple = search.CompanySearchResult("AAPL", "Apple Inc.", "NASDAQ", "stock")
+
+        with patch.dict("os.environ", {"FMP_API_KEY": "test"}), patch.object(
+            search, "_search_with_fmp", return_value=[apple]
+        ), patch.object(search, "_search_with_yahoo", return_value=[]) as mock_yahoo:
+            self.assertEqual(search.search_companies("aapl"), [apple])
+            mock_yahoo.assert_not_called()
+
+        search.search_companies.cache_clear()
+        with patch.dict("os.environ", {"FMP_API_KEY": "test"}), patch.object(
+            search, "_search_with_fmp", return_value=[]
+        ), patch.object(search, "_search_with_yahoo", return_value=[apple]) as mock_yahoo:
+            self.assertEqual(search.search_companies("aapl"), [apple])
+            mock_yahoo.assert_called_once()
+
+
+class FMPMetricsTests(SimpleTestCase):
+    """Valores esperados calculados con el bucle por registro previo al cálculo vectorizado."""
+
+    def _metricas(self, income, balance, ratios=(), usar_ratios=False):
+        from dcf_core import finanzas, fmp
+
+        cliente = MagicMock()
+        cliente.get_income_statements.return_value = list(income)
+        cliente.get_balance_sheet_statements.return_value = list(balance)
+        cliente.get_financial_ratios.return_value = list(ratios)
+        with patch.object(fmp, "_get_default_client", return_value=cliente), patch.object(
+            finanzas, "obtener_tasa_libre_riesgo", return_value=0.04
+        ), patch.object(fmp, "_usar_ratios_fmp", return_value=usar_ratios):
+            return fmp.obtener_metricas_financieras("TEST")
+
+    def assertMuestras(self, obtenido: dict, esperado: dict) -> None:
+        self.assertEqual(obtenido.keys(), esperado.keys())
+        for año, valor in esperado.items():
+            self.assertAlmostEqual(obtenido[año], valor, places=9)
+
+    def test_empty_statements(self) -> None:
+        metricas = self._metricas([], [])
+        self.assertIsNone(metricas.tax_rate)
+        self.assertIsNone(metricas.cost_of_debt)
+        self.assertEqual(metricas.tax_samples, {})
+        self.assertEqual(metricas.cost_samples, {})
+        self.assertEqual(metricas.reported_currency, "USD")
+        self.assertIsNone(metricas.nota_estructura_capital)
+
+    def test_non_numeric_total_debt_skips_year_and_none_uses_components(self) -> None:
+        income = [{
+            "calendarYear": "2024", "incomeTaxExpense": 21, "incomeBeforeTax": 100,
+            "interestExpense": 5, "operatingIncome": 50, "revenue": 1000,
+        }]
+        balance = [
+            {"calendarYear": "2024", "totalDebt": "n/a"},
+            {"calendarYear": "2023", "totalDebt": None, "shortTermDebt": 20, "longTermDebt": "80"},
+        ]
+        metricas = self._metricas(income, balance)
+        self.assertMuestras(metricas.tax_samples, {2024: 0.21})
+        # 2024 sin deuda válida: no hay Kd por año y se usa el fallback global
+        self.assertEqual(metricas.cost_samples, {})
+        self.assertAlmostEqual(metricas.cost_of_debt, 0.055)
+
+    def test_duplicate_years_keep_last_row(self) -> None:
+        income = [
+            {"calendarYear": "2024", "incomeTaxExpense": 20, "incomeBeforeTax": 100,
+             "interestExpense": 4, "operatingIncome": 40, "revenue": 500},
+            {"calendarYear": "2024", "incomeTaxExpense": 30, "incomeBeforeTax": 100,
+             "interestExpense": 6, "ebit": 60, "revenue": 400},
+        ]
+        balance = [{"calendarYear": "2024", "totalDebt": 100}, {"calendarYear": "2024", "totalDebt": 200}]
+        metricas = self._metricas(income, balance)
+        self.assertMuestras(metricas.tax_samples, {2024: 0.3})
+        self.assertMuestras(metricas.cost_samples, {2024: 0.055})
+
+    def test_ratios_present_and_absent(self) -> None:
+        income = [
+            {"calendarYear": "2024", "incomeTaxExpense": 25, "incomeBeforeTax": 100,
+             "interestExpense": 5, "operatingIncome": 50, "revenue": 1000},
+            {"date": "2023-09-30", "incomeTaxExpense": 18, "incomeBeforeTax": 90,
+             "interestExpenseNonOperating": 3, "operatingIncome": 45, "revenue": 900},
+        ]
+        balance = [{"calendarYear": "2024", "totalDebt": 100}, {"date": "2023-09-30", "totalDebt": 90}]
+        ratios = [
+            {"calendarYear": "2024", "effectiveTaxRate": 0.19},
+            {"calendarYear": "2023", "effectiveTaxRate": None},
+        ]
+
+        sin_ratios = self._metricas(income, balance, ratios, usar_ratios=False)
+        self.assertMuestras(sin_ratios.tax_samples, {2024: 0.25, 2023: 0.2})
+        self.assertAlmostEqual(sin_ratios.tax_rate, 0.225)
+        self.assertMuestras(sin_ratios.cost_samples, {2024: 0.05, 2023: 0.055})
+        self.assertAlmostEqual(sin_ratios.cost_of_debt, 0.0525)
+
+        con_ratios = self._metricas(income, balance, ratios, usar_ratios=True)
+        # 2023 sin effectiveTaxRate conserva la tasa reconstruida del income
+        self.assertMuestras(con_ratios.tax_samples, {2024: 0.19, 2023: 0.2})
+        self.assertAlmostEqual(con_ratios.tax_rate, 0.195)
+        self.assertMuestras(con_ratios.cost_samples, sin_ratios.cost_samples)
+
+    def test_debt_above_revenue_flags_financial_arm(self) -> None:
+        income = [{"calendarYear": "2024", "incomeTaxExpense": 10, "incomeBeforeTax": 50,
+                   "operatingIncome": 80, "revenue": 100}]
+        metricas = self._metricas(income, [{"calendarYear": "2024", "totalDebt": 500}])
+        self.assertAlmostEqual(metricas.cost_of_debt, 0.07)
+        self.assertIn("brazo financiero", metricas.nota_estructura_capital)
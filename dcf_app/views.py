@@ -61,8 +61,10 @@ def _check_ticker_eligibility(ticker: str) -> str | None:
         return cached or None  # "" → None (apto)
 
     try:
-        import yfinance as yf
-        info = yf.Ticker(ticker).info or {}
+        # Reusa el yf.Ticker del análisis: su .info queda memoizado y el DCF
+        # posterior del mismo ticker no vuelve a descargarlo
+        from dcf_core.empresa import obtener_ticker_yf
+        info = obtener_ticker_yf(ticker).info or {}
         quote_type = info.get("quoteType")
         long_name = info.get("longName") or info.get("shortName")
     except Exception:
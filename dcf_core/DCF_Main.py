@@ -4,15 +4,28 @@ from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
 
-from .empresa import analizar_empresa, _fetch_news, _generate_ai_summary, _primer_periodo_es_parcial
-from .finanzas import calcular_crecimientos, calcular_escenarios, calcular_tabla_sensibilidad
+from .empresa import (
+    analizar_empresa,
+    obtener_historial_yf,
+    obtener_ticker_yf,
+    _pipeline_noticias,
+    _primer_periodo_es_parcial,
+)
+from .finanzas import (
+    calcular_crecimientos,
+    calcular_escenarios,
+    calcular_tabla_sensibilidad,
+    obtener_tasa_libre_riesgo,
+)
 from .fmp import (
     FCFEntry,
     FMPClientError,
     FMPDerivedMetrics,
+    _calcular_kd_con_floor,
     obtener_fcf_historico,
     obtener_metricas_financieras,
 )
@@ -31,11 +44,12 @@ def _prefetch_concurrent(
 ) -> tuple[List[FCFEntry], Optional[str], Optional[FMPDerivedMetrics], Optional[str]]:
     """
     Lanza en paralelo todas las llamadas externas necesarias para el análisis:
-      - yfinance: info, cashflow, financials, balance_sheet, history(5y)
+      - yfinance: info, cashflow, financials, balance_sheet, history(5y, 1y)
       - FMP: FCF histórico + métricas financieras
 
-    Las propiedades de yfinance quedan cacheadas en el objeto, por lo que
-    los accesos posteriores son instantáneos.
+    Las propiedades de yfinance quedan cacheadas en el objeto y los
+    historiales en obtener_historial_yf, por lo que los accesos posteriores
+    son instantáneos.
 
     Devuelve (fcf_historial, fmp_fcf_error, metricas_fmp, fmp_metricas_error).
     """
@@ -70,19 +84,13 @@ def _prefetch_concurrent(
 
     def _yf_history_5y():
         try:
-            _ = empresa_yf.history(period="5y")
+            _ = obtener_historial_yf(empresa_yf, "5y")
         except Exception:
             pass
 
     def _yf_history_1y():
         try:
-            _ = empresa_yf.history(period="1y")
-        except Exception:
-            pass
-
-    def _yf_history_1d():
-        try:
-            _ = empresa_yf.history(period="1d")
+            _ = obtener_historial_yf(empresa_yf, "1y")
         except Exception:
             pass
 
@@ -111,7 +119,7 @@ def _prefetch_concurrent(
             fmp_metricas_error = str(exc)
 
     tasks = [_yf_info, _yf_cashflow, _yf_financials, _yf_balance,
-             _yf_history_5y, _yf_history_1y, _yf_history_1d, _yf_news,
+             _yf_history_5y, _yf_history_1y, _yf_news,
              _fmp_fcf, _fmp_metricas]
 
     with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
@@ -132,34 +140,18 @@ def _obtener_fcf_yfinance(ticker: str, empresa_yf: yf.Ticker, limite: int = 5) -
     if cashflow_temp is None or cashflow_temp.empty or "Free Cash Flow" not in cashflow_temp.index:
         return []
 
-    serie = cashflow_temp.loc["Free Cash Flow"].dropna()
+    # Un solo pase sobre el ndarray subyacente: sin Series intermedias de dropna/head.
+    valores = cashflow_temp.loc["Free Cash Flow"].to_numpy(dtype=np.float64, na_value=np.nan)
+    valores = valores[~np.isnan(valores)]
     # Excluir el primer período si es un año fiscal incompleto (stub del año en curso).
     # Un gap < 300 días entre los dos primeros períodos anuales indica un stub parcial.
-    if _primer_periodo_es_parcial(cashflow_temp) and len(serie) > 1:
-        serie = serie.iloc[1:]
-    serie = serie.head(limite)
-
-    valores: List[float] = []
-    if hasattr(serie, "tolist"):
-        iterador = serie.tolist()
-    else:
-        iterador = serie
-
-    for bruto in iterador:
-        try:
-            valores.append(float(bruto))
-        except (TypeError, ValueError):
-            continue
-
-    return valores
+    if _primer_periodo_es_parcial(cashflow_temp) and valores.size > 1:
+        valores = valores[1:]
+    return valores[:limite].tolist()
 
 
 def _obtener_metricas_yfinance(ticker: str, empresa_yf: yf.Ticker, limite: int = 5) -> tuple[Optional[float], Dict[int, float], Optional[float], Dict[int, float]]:
     """Calcula métricas de tasa y costo de deuda usando yfinance."""
-    import logging
-    logger = logging.getLogger(__name__)
-
-    from .finanzas import obtener_tasa_libre_riesgo
     try:
         rf = obtener_tasa_libre_riesgo()
     except Exception:
@@ -305,7 +297,6 @@ def _obtener_metricas_yfinance(ticker: str, empresa_yf: yf.Ticker, limite: int =
 
             # Apply floor: Kd must not be below Rf
             ebit_año = {año: ebit_por_año[año]} if año in ebit_por_año else None
-            from .fmp import _calcular_kd_con_floor
             kd = _calcular_kd_con_floor(
                 interes_float=interes_float,
                 deuda_financiera=deuda,
@@ -343,7 +334,7 @@ def ejecutar_dcf(ticker: str, metodo: str = "auto", fuente: str = "auto") -> dic
     fmp_error: str | None = None
     metricas_fuente: Dict[str, dict] = {}
 
-    empresa_yf = yf.Ticker(ticker)
+    empresa_yf = obtener_ticker_yf(ticker)
 
     # ── Pre-fetch en paralelo: yfinance × 5 + FMP × 2 ──────────
     fcf_historial, fmp_error, metricas_fmp, fmp_metricas_error = _prefetch_concurrent(
@@ -498,13 +489,8 @@ def ejecutar_dcf(ticker: str, metodo: str = "auto", fuente: str = "auto") -> dic
     # el pipeline news→IA corre en un thread separado. Se unen al final.
     nombre_empresa = (getattr(empresa_yf, "info", {}) or {}).get("shortName", ticker)
 
-    def _pipeline_noticias():
-        noticias, fuentes, error = _fetch_news(ticker, empresa_yf, nombre_empresa)
-        resumen, resumen_error = _generate_ai_summary(noticias, ticker, nombre_empresa)
-        return noticias, fuentes, error, resumen, resumen_error
-
     with ThreadPoolExecutor(max_workers=2) as _ex:
-        _f_noticias = _ex.submit(_pipeline_noticias)
+        _f_noticias = _ex.submit(_pipeline_noticias, ticker, empresa_yf, nombre_empresa)
         _f_dcf = _ex.submit(
             analizar_empresa,
             ticker, "auto", crecimiento, avg_growth_rate,
@@ -574,7 +560,7 @@ def ejecutar_dcf(ticker: str, metodo: str = "auto", fuente: str = "auto") -> dic
 
     # --- Historial de precios (5 años) para gráfico ---
     try:
-        hist = empresa_yf.history(period="5y")
+        hist = obtener_historial_yf(empresa_yf, "5y")
         if hist is not None and not hist.empty and "Close" in hist.columns:
             hist_clean = hist["Close"].dropna()
             resultado["precio_historico"] = {
@@ -231,8 +231,10 @@ def _fetch_yfinance_price_target(symbol: str) -> dict | None:
     """
 
     def _fetch() -> dict:
-        import yfinance as yf  # importación diferida para no penalizar módulos que no lo usan
-        return yf.Ticker(symbol).info
+        # importación diferida para no penalizar módulos que no lo usan; el
+        # Ticker compartido trae .info ya descargado si se acaba de analizar
+        from .empresa import obtener_ticker_yf
+        return obtener_ticker_yf(symbol).info
 
     try:
         with ThreadPoolExecutor(max_workers=1) as executor:
@@ -13,12 +13,14 @@ Usa únicamente los datos financieros que la app ya calcula —
 sin llamadas adicionales a APIs externas.
 """
 
+import logging
 import statistics as _stats
-import sys as _sys
 from typing import Optional
 
 from .utils import es_sector_financiero as _es_financiera_fn
 
+logger = logging.getLogger(__name__)
+
 
 # ---------------------------------------------------------------------------
 # Metadatos de cada etapa
@@ -481,15 +483,11 @@ def detect_company_stage(ticker: str, financials: dict) -> dict:
         and revenue_ttm < 50_000_000
         and (revenue_irregular or _rev_insuficiente)
     )
-    print(
-        f"[company_stage FIX5B] ticker={ticker!r} "
-        f"revenue_ttm={revenue_ttm} "
-        f"revenue_irregular={revenue_irregular} "
-        f"revenue_cv={revenue_cv} "
-        f"rev_hist_len={len(revenue_historico)} "
-        f"scores[2]_before={scores[2]:.1f} "
-        f"aplicar={_aplicar_fix5b}",
-        file=_sys.stderr,
+    logger.debug(
+        "[company_stage FIX5B] ticker=%r revenue_ttm=%s revenue_irregular=%s "
+        "revenue_cv=%s rev_hist_len=%d scores[2]_before=%.1f aplicar=%s",
+        ticker, revenue_ttm, revenue_irregular, revenue_cv,
+        len(revenue_historico), scores[2], _aplicar_fix5b,
     )
     if _aplicar_fix5b:
         scores[2] = 0.0
@@ -662,10 +660,10 @@ def detect_company_stage(ticker: str, financials: dict) -> dict:
     decline_secular = _decline_secular_primary or _decline_secular_2of3
 
     if revenue_growth is not None and revenue_growth < 0 and not decline_secular and not reestructuracion:
-        print(
-            f"[company_stage Override B] no disparado para {ticker!r}: "
-            f"revenue_growth={revenue_growth:.3%}, pb={pb_ratio}, pe={pe_ratio}",
-            file=_sys.stderr,
+        logger.debug(
+            "[company_stage Override B] no disparado para %r: "
+            "revenue_growth=%.3f%%, pb=%s, pe=%s",
+            ticker, revenue_growth * 100, pb_ratio, pe_ratio,
         )
     compresion_margenes = (
         revenue_growth is not None and revenue_growth < 0
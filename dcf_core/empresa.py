@@ -1,8 +1,13 @@
+import functools
+import logging
 import re
+import threading
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
 import yfinance as yf
@@ -17,33 +22,142 @@ from .finanzas import (
     seleccionar_metodo_crecimiento,
 )
 
-from .marketaux import MarketauxError, obtener_noticias_marketaux
+from .marketaux import (
+    MarketauxError,
+    MarketauxNewsItem,
+    obtener_noticias_marketaux,
+    obtener_noticias_marketaux_batch,
+)
 from .finnhub import FinnhubError, obtener_noticias_finnhub
 from .fmp import FCFEntry, obtener_sector_empresa, obtener_shares_diluidas_fmp
-from .utils import parse_datetime_epoch
+from .fx import (
+    convertir_a_usd,
+    detectar_moneda_yfinance,
+    obtener_fx_historico,
+    obtener_fx_spot,
+)
+from .utils import CacheTTL, parse_datetime_epoch
+
+logger = logging.getLogger(__name__)
 
 MAX_NEWS_ITEMS = 18
+# Hilos para analizar_empresas: el trabajo es I/O, el GIL se libera en sockets
+_MAX_WORKERS_BATCH = 16
+
+
+# ---------------------------------------------------------------------------
+# Caché de objetos y descargas de yfinance
+# ---------------------------------------------------------------------------
+
+# Mismo horizonte que el caché del resultado DCF en las vistas (10 minutos)
+_YF_CACHE_TTL_SECONDS = 10 * 60
+
+# Acotados: las claves vienen del usuario y cada yf.Ticker retiene info y estados
+_TICKER_CACHE = CacheTTL(maxsize=128, ttl=_YF_CACHE_TTL_SECONDS)
+_HISTORY_CACHE = CacheTTL(maxsize=256, ttl=_YF_CACHE_TTL_SECONDS)
+# analizar_empresas y el prefetch de DCF_Main piden el mismo ticker desde hilos:
+# el lock evita crear dos yf.Ticker para un símbolo
+_YF_CACHE_LOCK = threading.Lock()
+
+
+def obtener_ticker_yf(ticker: str) -> yf.Ticker:
+    """Devuelve un yf.Ticker reutilizado por símbolo.
+
+    yfinance guarda info, balance_sheet, cashflow, etc. dentro del propio
+    objeto tras la primera descarga, así que reutilizarlo entre análisis del
+    mismo ticker evita repetir esos round-trips a Yahoo.
+    """
+    simbolo = (ticker or "").upper().strip()
+    with _YF_CACHE_LOCK:
+        empresa_yf = _TICKER_CACHE.get(simbolo)
+        if empresa_yf is None:
+            empresa_yf = yf.Ticker(simbolo)
+            _TICKER_CACHE.set(simbolo, empresa_yf)
+    return empresa_yf
+
+
+def obtener_historial_yf(empresa_yf: yf.Ticker, period: str) -> pd.DataFrame:
+    """empresa_yf.history(period=...) con caché por (ticker, period).
+
+    A diferencia de info/balance_sheet, history() descarga de nuevo en cada
+    llamada; el prefetch de DCF_Main y los usos posteriores comparten así una
+    única descarga por período.
+    """
+    simbolo = getattr(empresa_yf, "ticker", None)
+    if not isinstance(simbolo, str):
+        return empresa_yf.history(period=period)
+
+    clave = (simbolo.upper(), period)
+    hist = _HISTORY_CACHE.get(clave)
+    if hist is None:
+        hist = empresa_yf.history(period=period)
+        _HISTORY_CACHE.set(clave, hist)
+    return hist
+
+
+def precargar_tickers(tickers: Sequence[str], period: str = "1y") -> Dict[str, yf.Ticker]:
+    """Descarga el historial de varios tickers en una sola llamada a yf.download.
+
+    Cada sub-DataFrame se guarda en el caché de obtener_historial_yf bajo
+    (ticker, period), de modo que el precio actual y el análisis técnico de
+    cada analizar_empresa salen de esa descarga compartida. Devuelve los
+    yf.Ticker (cacheados) de cada símbolo.
+    """
+    simbolos = list(dict.fromkeys(
+        t for t in ((ticker or "").upper().strip() for ticker in tickers) if t
+    ))
+    if not simbolos:
+        return {}
+
+    datos = yf.download(
+        simbolos,
+        period=period,
+        group_by="ticker",
+        threads=True,
+        progress=False,
+        auto_adjust=True,
+    )
+    if datos is not None and not datos.empty:
+        multi = isinstance(datos.columns, pd.MultiIndex)
+        for simbolo in simbolos:
+            if multi:
+                if simbolo not in datos.columns.get_level_values(0):
+                    continue
+                hist = datos[simbolo]
+            else:
+                hist = datos
+            # Calendarios distintos entre mercados dejan filas vacías por ticker
+            hist = hist.dropna(how="all")
+            if not hist.empty:
+                _HISTORY_CACHE.set((simbolo, period), hist)
+
+    return {simbolo: obtener_ticker_yf(simbolo) for simbolo in simbolos}
 
 
 # ---------------------------------------------------------------------------
 # Helpers de conversión (nivel de módulo para reutilización)
 # ---------------------------------------------------------------------------
 
+# float(complex) lanza TypeError, así que el caso complejo (muy raro) se
+# resuelve dentro del except y el camino habitual no paga el isinstance.
+
 def to_float(value, default=0.0) -> float:
-    if isinstance(value, complex):
-        value = value.real
     try:
         return float(value)
     except (TypeError, ValueError):
+        if isinstance(value, complex):
+            return value.real
         return float(default)
 
 
 def to_billions(value) -> Optional[float]:
-    if isinstance(value, complex):
-        value = value.real
+    if value is None:
+        return None
     try:
-        return float(value) / 1_000_000_000 if value is not None else None
+        return float(value) / 1_000_000_000
     except (TypeError, ValueError):
+        if isinstance(value, complex):
+            return value.real / 1_000_000_000
         return None
 
 
@@ -63,11 +177,24 @@ def smart_format_billions(value) -> Optional[str]:
 
 def to_optional_float(value) -> Optional[float]:
     try:
-        if isinstance(value, complex):
-            value = value.real
         return float(value)
     except (TypeError, ValueError):
+        if isinstance(value, complex):
+            return value.real
+        return None
+
+
+def _primer_valor_fila(df, label: str) -> Optional[float]:
+    """Primer valor no-NaN de una fila de un DataFrame de yfinance, o None.
+
+    Trabaja sobre el ndarray de la fila en vez de encadenar dropna()/iloc,
+    que alocan una Series nueva por cada acceso.
+    """
+    if df is None or df.empty or label not in df.index:
         return None
+    fila = df.loc[label].to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = fila[~np.isnan(fila)]
+    return float(validos[0]) if validos.size else None
 
 
 def _primer_periodo_es_parcial(df_anual) -> bool:
@@ -210,23 +337,29 @@ def _fetch_news(
     ticker: str,
     empresa_yf: yf.Ticker,
     nombre: str,
+    noticias_marketaux: Optional[List[MarketauxNewsItem]] = None,
 ) -> Tuple[List[dict], set, Optional[str]]:
-    """Obtiene y deduplica noticias de Marketaux, Finnhub e yfinance."""
+    """Obtiene y deduplica noticias de Marketaux, Finnhub e yfinance.
+
+    Si ``noticias_marketaux`` viene precargado (modo batch) no se vuelve a
+    consultar Marketaux para este ticker.
+    """
 
     noticias: List[dict] = []
     noticias_fuentes: set = set()
     noticias_error: Optional[str] = None
 
     # --- Marketaux ---
-    try:
-        noticias_marketaux = obtener_noticias_marketaux(ticker, limite=MAX_NEWS_ITEMS)
-    except MarketauxError as exc:
-        noticias_error = _limpiar_mensaje_api(str(exc))
-        noticias_marketaux = []
-    except Exception as exc:
-        mensaje = f"No se pudieron obtener noticias desde Marketaux ({_limpiar_mensaje_api(str(exc))})."
-        noticias_error = mensaje
-        noticias_marketaux = []
+    if noticias_marketaux is None:
+        try:
+            noticias_marketaux = obtener_noticias_marketaux(ticker, limite=MAX_NEWS_ITEMS)
+        except MarketauxError as exc:
+            noticias_error = _limpiar_mensaje_api(str(exc))
+            noticias_marketaux = []
+        except Exception as exc:
+            mensaje = f"No se pudieron obtener noticias desde Marketaux ({_limpiar_mensaje_api(str(exc))})."
+            noticias_error = mensaje
+            noticias_marketaux = []
 
     if noticias_marketaux:
         noticias_fuentes.add("marketaux")
@@ -408,6 +541,31 @@ def _generate_ai_summary(
     return resumen_noticias, resumen_noticias_error
 
 
+def _pipeline_noticias(
+    ticker: str,
+    empresa_yf: yf.Ticker,
+    nombre: str,
+    noticias_marketaux: Optional[List[MarketauxNewsItem]] = None,
+    cancelado: Optional[threading.Event] = None,
+) -> Tuple[List[dict], set, Optional[str], Optional[dict], Optional[str]]:
+    """Cadena noticias → resumen IA. No depende de la valuación, así que puede
+    correr en un thread aparte mientras se calcula el DCF.
+
+    Si ``cancelado`` se activa antes de terminar las noticias, no se pide el
+    resumen al LLM."""
+    noticias, fuentes, error = _fetch_news(ticker, empresa_yf, nombre, noticias_marketaux)
+    if cancelado is not None and cancelado.is_set():
+        return noticias, fuentes, error, None, None
+    resumen, resumen_error = _generate_ai_summary(noticias, ticker, nombre)
+    return noticias, fuentes, error, resumen, resumen_error
+
+
+def _detener_noticias(executor: ThreadPoolExecutor, cancelado: threading.Event) -> None:
+    """Evita que un pipeline de noticias en curso llegue al LLM y libera el executor sin esperarlo."""
+    cancelado.set()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
 # ---------------------------------------------------------------------------
 # Función principal
 # ---------------------------------------------------------------------------
@@ -434,7 +592,7 @@ def _calcular_rsi(close: "pd.Series", period: int = 14) -> Optional[float]:
 def calcular_analisis_tecnico(empresa_yf: yf.Ticker, precio_actual: float) -> dict:
     """Calcula indicadores técnicos básicos: SMAs y RSI."""
     try:
-        hist = empresa_yf.history(period="1y")
+        hist = obtener_historial_yf(empresa_yf, "1y")
     except Exception:
         hist = None
 
@@ -533,7 +691,8 @@ def calcular_analisis_tecnico(empresa_yf: yf.Ticker, precio_actual: float) -> di
     }
 
 
-def analizar_empresa(
+def _analizar_empresa(
+    pila: ExitStack,
     ticker,
     metodo_crecimiento="auto",
     crecimiento=0.05,
@@ -547,22 +706,23 @@ def analizar_empresa(
     moneda_reporte: str = "USD",
     fx_spot: float = 1.0,
     fx_historico: Optional[dict] = None,
+    noticias_marketaux: Optional[List[MarketauxNewsItem]] = None,
 ):
     if fx_historico is None:
         fx_historico = {}
 
     if empresa_yf is None:
-        empresa_yf = yf.Ticker(ticker)
+        empresa_yf = obtener_ticker_yf(ticker)
 
     info = getattr(empresa_yf, "info", {}) or {}
+    # Método ligado una sola vez: analizar_empresa consulta ~40 claves de info
+    info_get = info.get
 
     # Detección de moneda para llamadas standalone (sin DCF_Main).
     # Si DCF_Main ya detectó y pasó moneda_reporte != "USD", respetar ese valor.
     if moneda_reporte == "USD":
-        from .fx import detectar_moneda_yfinance
         moneda_reporte = detectar_moneda_yfinance(info)
     if moneda_reporte != "USD" and fx_spot == 1.0:
-        from .fx import obtener_fx_spot, obtener_fx_historico
         fx_spot = obtener_fx_spot(moneda_reporte)
         fx_historico = obtener_fx_historico(moneda_reporte)
 
@@ -571,7 +731,6 @@ def analizar_empresa(
     def _to_usd(valor, fecha=None):
         if fx_spot == 1.0 or valor is None:
             return valor
-        from .fx import convertir_a_usd
         if fecha is not None:
             return convertir_a_usd(float(valor), fecha, fx_historico, fx_spot)
         return float(valor) / fx_spot
@@ -584,15 +743,33 @@ def analizar_empresa(
             f"Spot actual: {fx_spot:,.2f} {moneda_reporte}/USD."
         )
 
-    history = empresa_yf.history(period="1d")
+    nombre = info_get("longName", ticker)
+
+    # Noticias + resumen IA no dependen de la valuación: se lanzan ya en un
+    # thread aparte y se recogen al final, solapando la latencia del LLM con
+    # las descargas de balance/cashflow y el cálculo del DCF.
+    noticias_executor: Optional[ThreadPoolExecutor] = None
+    noticias_future = None
+    if not skip_news:
+        noticias_executor = ThreadPoolExecutor(max_workers=1)
+        noticias_cancelado = threading.Event()
+        # Se detiene al salir de analizar_empresa, también si la valuación falla
+        pila.callback(_detener_noticias, noticias_executor, noticias_cancelado)
+        noticias_future = noticias_executor.submit(
+            _pipeline_noticias, ticker, empresa_yf, nombre, noticias_marketaux, noticias_cancelado
+        )
+
+    # El último cierre del historial diario de 1 año es el mismo que daría
+    # period="1d"; se usa el de 1y porque calcular_analisis_tecnico lo
+    # necesita igual y así sale del mismo caché en una sola descarga.
+    history = obtener_historial_yf(empresa_yf, "1y")
 
-    nombre = info.get("longName", ticker)
-    sector = info.get("sector") or ""
+    sector = info_get("sector") or ""
     if not sector:
         sector, _ = obtener_sector_empresa(ticker)
     if not sector:
         sector = "Desconocido"
-    beta = to_float(info.get("beta"), 1.0)
+    beta = to_float(info_get("beta"), 1.0)
     beta_aviso = None
     if beta <= 0:
         beta_aviso = (
@@ -600,18 +777,18 @@ def analizar_empresa(
             "como valor mínimo para el cálculo del CAPM"
         )
         beta = 0.5
-    tax_rate_info = to_float(info.get("effectiveTaxRate"), 0.25)
-    cost_of_debt_info = to_float(info.get("yield"), 0.05)
+    tax_rate_info = to_float(info_get("effectiveTaxRate"), 0.25)
+    cost_of_debt_info = to_float(info_get("yield"), 0.05)
 
     tax_rate = tax_rate_info if tax_rate_override is None else float(tax_rate_override)
     cost_of_debt = cost_of_debt_info if cost_of_debt_override is None else float(cost_of_debt_override)
 
-    acciones = to_float(info.get("sharesOutstanding"), 0)
+    acciones = to_float(info_get("sharesOutstanding"), 0)
     precio = 0.0
     if not history.empty:
         precio = to_float(history["Close"].iloc[-1], 0)
     else:
-        precio = to_float(info.get("currentPrice") or info.get("previousClose"), 0)
+        precio = to_float(info_get("currentPrice") or info_get("previousClose"), 0)
 
     acciones_ajuste_aviso = None
 
@@ -632,7 +809,7 @@ def analizar_empresa(
             pass
 
     # CORRECCIÓN 1 — Chequeo de consistencia mejorado: market_cap / precio como referencia
-    market_cap_yf = to_float(info.get("marketCap"), 0)
+    market_cap_yf = to_float(info_get("marketCap"), 0)
     if acciones and precio and market_cap_yf:
         shares_implicitas = market_cap_yf / precio
         if shares_implicitas > 0:
@@ -665,22 +842,20 @@ def analizar_empresa(
         else None
     )
     debt = 0.0
-    if balance is not None and not balance.empty and "Long Term Debt" in balance.index:
-        deuda_series = balance.loc["Long Term Debt"].dropna()
-        if not deuda_series.empty:
-            debt = to_float(_to_usd(deuda_series.iloc[0], _bs_fecha), 0)
-    cash = _to_usd(to_float(info.get("totalCash"), 0) or None, _bs_fecha) or 0.0
+    _deuda_lp = _primer_valor_fila(balance, "Long Term Debt")
+    if _deuda_lp is not None:
+        debt = to_float(_to_usd(_deuda_lp, _bs_fecha), 0)
+    cash = _to_usd(to_float(info_get("totalCash"), 0) or None, _bs_fecha) or 0.0
     if (not cash) and balance is not None and not balance.empty:
         for label in (
             "Cash And Cash Equivalents",
             "Cash Cash Equivalents And Short Term Investments",
             "Cash Equivalents",
         ):
-            if label in balance.index:
-                cash_series = balance.loc[label].dropna()
-                if not cash_series.empty:
-                    cash = to_float(_to_usd(cash_series.iloc[0], _bs_fecha), 0)
-                    break
+            _cash = _primer_valor_fila(balance, label)
+            if _cash is not None:
+                cash = to_float(_to_usd(_cash, _bs_fecha), 0)
+                break
     net_debt = debt - cash  # LT-only, mantenido por compatibilidad
 
     # Deuda total (LP + corriente) para cálculo correcto del equity value
@@ -688,13 +863,13 @@ def analizar_empresa(
     current_debt = 0.0
     if balance is not None and not balance.empty:
         if "Total Debt" in balance.index:
-            _td = balance.loc["Total Debt"].dropna()
-            if not _td.empty:
-                total_debt = to_float(_to_usd(_td.iloc[0], _bs_fecha), 0)
+            _td = _primer_valor_fila(balance, "Total Debt")
+            if _td is not None:
+                total_debt = to_float(_to_usd(_td, _bs_fecha), 0)
         elif "Short Long Term Debt" in balance.index:
-            _cd = balance.loc["Short Long Term Debt"].dropna()
-            if not _cd.empty:
-                current_debt = to_float(_to_usd(_cd.iloc[0], _bs_fecha), 0)
+            _cd = _primer_valor_fila(balance, "Short Long Term Debt")
+            if _cd is not None:
+                current_debt = to_float(_to_usd(_cd, _bs_fecha), 0)
                 total_debt = debt + current_debt
     net_debt_total = total_debt - cash
 
@@ -716,16 +891,15 @@ def analizar_empresa(
             "Working Capital":                         "wc",
         }
         for _label, _key in _bs_map.items():
-            if _label in balance.index:
-                _s = balance.loc[_label].dropna()
-                if not _s.empty:
-                    _v = _to_usd(to_optional_float(_s.iloc[0]), _bs_fecha)
-                    if _key == "ca":   total_current_assets_val = _v
-                    elif _key == "cl": total_current_liabilities_val = _v
-                    elif _key == "ta": total_assets_val = _v
-                    elif _key == "tl": total_liab_val = _v
-                    elif _key == "re": retained_earnings_val = _v
-                    elif _key == "wc": working_capital_val = _v
+            _primero = _primer_valor_fila(balance, _label)
+            if _primero is not None:
+                _v = _to_usd(_primero, _bs_fecha)
+                if _key == "ca":   total_current_assets_val = _v
+                elif _key == "cl": total_current_liabilities_val = _v
+                elif _key == "ta": total_assets_val = _v
+                elif _key == "tl": total_liab_val = _v
+                elif _key == "re": retained_earnings_val = _v
+                elif _key == "wc": working_capital_val = _v
 
     # Compute working capital if not directly available
     if working_capital_val is None and total_current_assets_val is not None and total_current_liabilities_val is not None:
@@ -757,28 +931,24 @@ def analizar_empresa(
         _stmt = income_stmt
         if _stmt is not None and not _stmt.empty:
             for _ebit_label in ("EBIT", "Operating Income"):
-                if _ebit_label in _stmt.index:
-                    _ebit_s = _stmt.loc[_ebit_label].dropna()
-                    if not _ebit_s.empty:
-                        ebit_val = _to_usd(to_optional_float(_ebit_s.iloc[0]), _is_fecha)
-                        break
+                _ebit = _primer_valor_fila(_stmt, _ebit_label)
+                if _ebit is not None:
+                    ebit_val = _to_usd(_ebit, _is_fecha)
+                    break
     except Exception:
         ebit_val = None
 
     # EBITDA — primary from yfinance info (en moneda local → spot), fallback EBIT + D&A
-    ebitda_val = _to_usd(to_optional_float(info.get("ebitda")))
+    ebitda_val = _to_usd(to_optional_float(info_get("ebitda")))
     if ebitda_val is None and ebit_val is not None:
         try:
             _cf = getattr(empresa_yf, "cashflow", None)
             if _cf is not None and not _cf.empty:
                 for _da_label in ("Depreciation & Amortization", "Depreciation", "DepreciationAndAmortization"):
-                    if _da_label in _cf.index:
-                        _da_s = _cf.loc[_da_label].dropna()
-                        if not _da_s.empty:
-                            _da = to_optional_float(_da_s.iloc[0])
-                            if _da is not None:
-                                ebitda_val = ebit_val + abs(_da)
-                            break
+                    _da = _primer_valor_fila(_cf, _da_label)
+                    if _da is not None:
+                        ebitda_val = ebit_val + abs(_da)
+                        break
         except Exception:
             pass
 
@@ -817,7 +987,7 @@ def analizar_empresa(
         eps_growth_5y = None
     # Final fallback: YoY earningsGrowth from info
     if eps_growth_5y is None:
-        _eg = to_optional_float(info.get("earningsGrowth"))
+        _eg = to_optional_float(info_get("earningsGrowth"))
         if _eg is not None:
             eps_growth_5y = _eg
             eps_growth_5y_fuente = "YoY earningsGrowth (yfinance)"
@@ -863,11 +1033,16 @@ def analizar_empresa(
         cashflow = getattr(empresa_yf, "cashflow", None)
         _cashflow_parcial = _primer_periodo_es_parcial(cashflow)
         if cashflow is not None and not cashflow.empty and "Free Cash Flow" in cashflow.index:
-            _fcf_raw_series = cashflow.loc["Free Cash Flow"].dropna()
-            if _cashflow_parcial and len(_fcf_raw_series) > 1:
-                _fcf_raw_series = _fcf_raw_series.iloc[1:]
-            fcf_series = _fcf_raw_series.head(5)
-            for _col, _val in fcf_series.items():
+            # Filtrar NaN sobre el ndarray y recortar columnas en paralelo,
+            # sin materializar Series intermedias con dropna()/iloc/head
+            _fcf_arr = cashflow.loc["Free Cash Flow"].to_numpy(dtype=np.float64, na_value=np.nan)
+            _validos = ~np.isnan(_fcf_arr)
+            _fcf_vals = _fcf_arr[_validos]
+            _fcf_cols = cashflow.columns[_validos]
+            if _cashflow_parcial and _fcf_vals.size > 1:
+                _fcf_vals = _fcf_vals[1:]
+                _fcf_cols = _fcf_cols[1:]
+            for _col, _val in zip(_fcf_cols[:5], _fcf_vals[:5].tolist()):
                 _v = to_float(_to_usd(_val, _col), 0.0)
                 try:
                     _yr = _col.year if hasattr(_col, "year") else int(str(_col)[:4])
@@ -880,7 +1055,7 @@ def analizar_empresa(
     # La serie anual fcf[] solo se usa para el CAGR histórico.
     fcf_actual = _ttm_q["fcf"] if _ttm_q["fcf"] is not None else (fcf[0] if fcf else 0.0)
 
-    pe_ratio_raw = info.get("trailingPE")
+    pe_ratio_raw = info_get("trailingPE")
     pe_ratio = to_float(pe_ratio_raw) if pe_ratio_raw is not None else None
 
     tasa_rf, rf_fuente = obtener_tasa_libre_riesgo_con_fuente()
@@ -901,9 +1076,6 @@ def analizar_empresa(
         tasa_crecimiento = _CAGR_CAP_DCF
         cagr_cap_applied = True
 
-    import logging as _logging
-    _logger = _logging.getLogger(__name__)
-
     capm = tasa_rf + beta * (market_return - tasa_rf)
     wacc = calcular_wacc(beta, debt, equity, cost_of_debt, tax_rate, tasa_rf)
 
@@ -920,7 +1092,7 @@ def analizar_empresa(
                 f"({tasa_rf:.2%}). El valor terminal puede estar fuertemente inflado. "
                 f"Revisar el costo de deuda (Kd) y la estructura de capital."
             )
-            _logger.warning(wacc_below_rf_aviso)
+            logger.warning(wacc_below_rf_aviso)
         else:
             wacc_below_rf = False
 
@@ -933,17 +1105,17 @@ def analizar_empresa(
                     f"{spread:.2%} extremadamente bajo. El valor terminal puede estar inflado."
                 )
 
-    revenue_per_share_raw = info.get("revenuePerShare")
+    revenue_per_share_raw = info_get("revenuePerShare")
     revenue_per_share = to_float(revenue_per_share_raw) if revenue_per_share_raw else None
-    book_value_raw = info.get("bookValue")
+    book_value_raw = info_get("bookValue")
     book_value = to_float(book_value_raw) if book_value_raw else None
 
     ps_ratio = (precio / revenue_per_share) if revenue_per_share else None
     pb_ratio = (precio / book_value) if book_value else None
-    roe = info.get("returnOnEquity")
+    roe = info_get("returnOnEquity")
     debt_to_capital = (debt / (debt + equity)) if (debt + equity) else 0
-    volume = to_float(info.get("volume"), 0)
-    revenue_growth = info.get("revenueGrowth")
+    volume = to_float(info_get("volume"), 0)
+    revenue_growth = info_get("revenueGrowth")
     filtros = [
         {
             "nombre": "P/E",
@@ -1028,10 +1200,10 @@ def analizar_empresa(
         diferencia_pct = ((diferencia / precio) * 100) if diferencia is not None and precio else None
 
     dividend_yield = normalizar_dividend_yield(
-        info.get("dividendYield"), info.get("dividendRate"), precio
+        info_get("dividendYield"), info_get("dividendRate"), precio
     )
-    total_assets = _to_usd(to_optional_float(info.get("totalAssets")))
-    total_liabilities = _to_usd(to_optional_float(info.get("totalLiab")))
+    total_assets = _to_usd(to_optional_float(info_get("totalAssets")))
+    total_liabilities = _to_usd(to_optional_float(info_get("totalLiab")))
     net_worth_per_share = None
     if total_assets and total_liabilities and acciones:
         net_worth_per_share = (total_assets - total_liabilities) / acciones
@@ -1062,12 +1234,12 @@ def analizar_empresa(
     revenue_raw = (
         _ttm_q["revenue"]
         if _ttm_q["revenue"] is not None
-        else _to_usd(to_optional_float(info.get("totalRevenue")))
+        else _to_usd(to_optional_float(info_get("totalRevenue")))
     )
     gross_profit_raw = (
         _ttm_q["gross_profit"]
         if _ttm_q["gross_profit"] is not None
-        else _to_usd(to_optional_float(info.get("grossProfits")))
+        else _to_usd(to_optional_float(info_get("grossProfits")))
     )
     escala_ajustada = False
     escala_aviso = None
@@ -1087,20 +1259,20 @@ def analizar_empresa(
             f"market cap ${_mcap_b:.1f}B — posible conversión de moneda local sin ajustar."
         )
 
-    annual_dividend = to_optional_float(info.get("dividendRate"))
+    annual_dividend = to_optional_float(info_get("dividendRate"))
     detalles_metricas = metricas_fuente or {}
-    eps_ttm = to_optional_float(info.get("trailingEps"))
+    eps_ttm = to_optional_float(info_get("trailingEps"))
     net_income_ttm = (
         _ttm_q["net_income"]
         if _ttm_q["net_income"] is not None
-        else _to_usd(to_optional_float(info.get("netIncomeToCommon")))
+        else _to_usd(to_optional_float(info_get("netIncomeToCommon")))
     )
-    if net_income_ttm is None and income_stmt is not None and not income_stmt.empty and "Net Income" in income_stmt.index:
-        net_income_series = income_stmt.loc["Net Income"].dropna()
-        if not net_income_series.empty:
-            net_income_ttm = _to_usd(to_optional_float(net_income_series.iloc[0]), _is_fecha)
+    if net_income_ttm is None:
+        _ni_reciente = _primer_valor_fila(income_stmt, "Net Income")
+        if _ni_reciente is not None:
+            net_income_ttm = _to_usd(_ni_reciente, _is_fecha)
 
-    payout_ratio = to_optional_float(info.get("payoutRatio"))
+    payout_ratio = to_optional_float(info_get("payoutRatio"))
     if payout_ratio is None and eps_ttm is not None and eps_ttm > 0 and annual_dividend is not None:
         payout_ratio = annual_dividend / eps_ttm
 
@@ -1177,12 +1349,12 @@ def analizar_empresa(
 
     # ── Derived metrics for 6-category data accordion ─────────────────────
     _fcf_ttm_raw = _ttm_q["fcf"] if _ttm_q["fcf"] is not None else (fcf[0] if fcf else None)
-    _ta_final = total_assets_val if total_assets_val is not None else to_optional_float(info.get("totalAssets"))
-    _tl_final = total_liab_val if total_liab_val is not None else to_optional_float(info.get("totalLiab"))
+    _ta_final = total_assets_val if total_assets_val is not None else to_optional_float(info_get("totalAssets"))
+    _tl_final = total_liab_val if total_liab_val is not None else to_optional_float(info_get("totalLiab"))
 
-    roa_raw = to_optional_float(info.get("returnOnAssets"))
-    current_ratio_raw = to_optional_float(info.get("currentRatio"))
-    fifty_two_week_high = to_optional_float(info.get("fiftyTwoWeekHigh"))
+    roa_raw = to_optional_float(info_get("returnOnAssets"))
+    current_ratio_raw = to_optional_float(info_get("currentRatio"))
+    fifty_two_week_high = to_optional_float(info_get("fiftyTwoWeekHigh"))
 
     p_fcf_raw = (equity / _fcf_ttm_raw) if (_fcf_ttm_raw and _fcf_ttm_raw > 0 and equity) else None
     fcf_per_share = (_fcf_ttm_raw / acciones) if (_fcf_ttm_raw is not None and acciones) else None
@@ -1280,15 +1452,15 @@ def analizar_empresa(
     datos_empresa = {
         "nombre": nombre,
         "sector": sector,
-        "industria": info.get("industry"),
-        "descripcion": info.get("longBusinessSummary"),
-        "pais": info.get("country"),
-        "ciudad": info.get("city"),
-        "sitio_web": info.get("website"),
-        "empleados": info.get("fullTimeEmployees"),
+        "industria": info_get("industry"),
+        "descripcion": info_get("longBusinessSummary"),
+        "pais": info_get("country"),
+        "ciudad": info_get("city"),
+        "sitio_web": info_get("website"),
+        "empleados": info_get("fullTimeEmployees"),
         # Datos adicionales para valuación multi-modelo
         "eps_ttm": eps_ttm,
-        "eps_forward": to_optional_float(info.get("forwardEps")),
+        "eps_forward": to_optional_float(info_get("forwardEps")),
         "revenue_ttm": revenue_raw,
         "revenue_ttm_billones": to_billions(revenue_raw),
         "revenue_ttm_display": smart_format_billions(revenue_raw),
@@ -1451,25 +1623,33 @@ def analizar_empresa(
         "net_worth_per_share": net_worth_per_share,
         "safety_margin": safety_margin,
         "safety_margin_pct": safety_margin * 100 if safety_margin is not None else None,
-        "fifty_two_week_low": info.get("fiftyTwoWeekLow"),
+        "fifty_two_week_low": info_get("fiftyTwoWeekLow"),
         "dividend_cagr": _dividend_cagr,
         "dividend_cagr_pct": round(_dividend_cagr * 100, 2) if _dividend_cagr is not None else None,
         "dividend_years": _dividend_years,
     }
 
-    net_margin = to_optional_float(info.get("profitMargins"))
+    net_margin = to_optional_float(info_get("profitMargins"))
 
     analisis_tecnico = calcular_analisis_tecnico(empresa_yf, precio)
 
-    if skip_news:
+    if noticias_future is None:
         noticias: List[dict] = []
         noticias_fuentes: set = set()
         noticias_error = None
         resumen_noticias = None
         resumen_noticias_error = None
     else:
-        noticias, noticias_fuentes, noticias_error = _fetch_news(ticker, empresa_yf, nombre)
-        resumen_noticias, resumen_noticias_error = _generate_ai_summary(noticias, ticker, nombre)
+        try:
+            (
+                noticias,
+                noticias_fuentes,
+                noticias_error,
+                resumen_noticias,
+                resumen_noticias_error,
+            ) = noticias_future.result()
+        finally:
+            noticias_executor.shutdown(wait=False)
 
     mapa_fuentes = {
         "marketaux": "Marketaux",
@@ -1526,6 +1706,69 @@ def analizar_empresa(
     }
 
 
+@functools.wraps(_analizar_empresa)
+def analizar_empresa(*args, **kwargs):
+    # El pipeline de noticias que lanza _analizar_empresa se cancela al salir,
+    # también cuando la valuación levanta una excepción
+    with ExitStack() as pila:
+        return _analizar_empresa(pila, *args, **kwargs)
+
+
+def analizar_empresas(tickers: Sequence[str], **kwargs) -> Dict[str, dict]:
+    """Analiza varios tickers en paralelo compartiendo la descarga de noticias.
+
+    Marketaux se consulta en bloques de hasta 20 símbolos por petición y las
+    noticias se reparten por ticker antes de llamar a analizar_empresa, en vez
+    de una petición por ticker; solo los tickers sin ningún artículo en el
+    batch vuelven a la consulta individual. Finnhub y yfinance
+    no exponen un endpoint multi-símbolo y siguen consultándose por ticker
+    dentro de _fetch_news.
+
+    Con más de un ticker, el historial de precios de todos se baja antes en
+    una única llamada a yf.download (precargar_tickers).
+
+    Cada análisis es casi todo espera de red (yfinance, FRED, noticias), así
+    que se reparten en un ThreadPoolExecutor. El dict resultante conserva el
+    orden de ``tickers``; un ticker cuyo análisis falla queda como
+    ``{"error": mensaje}`` sin afectar a los demás.
+    """
+    simbolos = list(dict.fromkeys(
+        t for t in ((ticker or "").upper().strip() for ticker in tickers) if t
+    ))
+
+    if not simbolos:
+        return {}
+
+    if len(simbolos) > 1 and kwargs.get("empresa_yf") is None:
+        try:
+            precargar_tickers(simbolos)
+        except Exception:
+            # Sin precarga: cada analizar_empresa descarga su propio historial
+            pass
+
+    noticias_batch: Dict[str, List[MarketauxNewsItem]] = {}
+    if not kwargs.get("skip_news"):
+        try:
+            noticias_batch = obtener_noticias_marketaux_batch(simbolos, limite=MAX_NEWS_ITEMS)
+        except Exception:
+            # Sin batch: cada analizar_empresa consulta Marketaux por su cuenta
+            noticias_batch = {}
+
+    def _analizar(ticker: str) -> dict:
+        # Solo un ticker sin ninguna coincidencia en el batch vuelve a la consulta
+        # individual (None); con alguna se usan esas y Finnhub/yfinance completan
+        precargadas = noticias_batch.get(ticker) or None
+        try:
+            return analizar_empresa(ticker, noticias_marketaux=precargadas, **kwargs)
+        except Exception as exc:
+            # Un ticker deslistado o sin datos no descarta el resto del lote
+            logger.warning("[%s] analizar_empresas: análisis fallido (%s)", ticker, exc)
+            return {"error": str(exc)}
+
+    with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS_BATCH, len(simbolos))) as ex:
+        return dict(zip(simbolos, ex.map(_analizar, simbolos)))
+
+
 def build_filtros_por_etapa(resultado: dict, stage: int) -> list:
     """Genera filtros financieros con umbrales adaptados a la etapa del ciclo de vida.
 
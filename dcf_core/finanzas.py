@@ -1,29 +1,74 @@
 import math
 import os
-import requests
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:  # numba es opcional: sin él se usa la ruta NumPy
+    _HAS_NUMBA = False
+    prange = range
+
+    def njit(*_args, **_kwargs):
+        def _decorar(func):
+            return func
+        return _decorar
+
+from .http_cache import FileCache
+from .utils import crear_sesion_http
+
+__all__ = [
+    "G_TERMINAL",
+    "calcular_crecimientos",
+    "calcular_escenarios",
+    "calcular_precio_dcf",
+    "calcular_tabla_sensibilidad",
+    "calcular_valor_intrinseco",
+    "calcular_wacc",
+    "mc_valor_intrinseco",
+    "obtener_tasa_libre_riesgo",
+    "obtener_tasa_libre_riesgo_con_fuente",
+    "proyectar_fcf",
+    "seleccionar_metodo_crecimiento",
+]
 
 # Tasa de crecimiento a perpetuidad compartida por DCF y Reverse DCF
 G_TERMINAL = 0.025
 
 # Obtiene la tasa libre de riesgo desde la API de la Fed
+# DGS10 se publica una vez por día: se cachea en disco 24h
+_FRED_URL = "https://api.stlouisfed.org/fred/series/observations"
+_FRED_CACHE = FileCache("fred")
+_FRED_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
+@lru_cache(maxsize=1)
+def _sesion():
+    # Perezosa: importar finanzas no arrastra requests hasta la primera consulta
+    return crear_sesion_http()
 
 
 def obtener_tasa_libre_riesgo_con_fuente():
     """Obtiene la tasa libre de riesgo e indica si vino de FRED o fallback."""
     fred_api_key = os.environ.get("FRED_API_KEY") or ""
-    try:
-        response = requests.get(
-            "https://api.stlouisfed.org/fred/series/observations",
-            params={
-                "series_id": "DGS10",
-                "api_key": fred_api_key,
-                "file_type": "json",
-                "sort_order": "desc",
-                "limit": 1
-            }
-        )
+    params = {
+        "series_id": "DGS10",
+        "api_key": fred_api_key,
+        "file_type": "json",
+        "sort_order": "desc",
+        "limit": 1
+    }
+
+    def _descargar():
+        response = _sesion().get(_FRED_URL, params=params, timeout=10)
         response.raise_for_status()
-        datos = response.json()
+        return response.json()
+
+    try:
+        datos = _FRED_CACHE.get_or_fetch(
+            _FRED_URL, params, _FRED_CACHE_TTL_SECONDS, _descargar)
         ultima = next(
             (obs for obs in datos["observations"] if obs["value"] != "."), None)
         if ultima:
@@ -41,18 +86,78 @@ def obtener_tasa_libre_riesgo():
 # Calcula el WACC (Weighted Average Cost of Capital)
 
 
+@njit(cache=True)
+def _wacc_core(beta, debt, equity, cost_of_debt, tax_rate, risk_free_rate, market_return):
+    prima_mercado = market_return - risk_free_rate
+    cost_of_equity = risk_free_rate + beta * prima_mercado
+    # Una sola división: el peso de la deuda es el complemento del de equity
+    peso_equity = equity * (1.0 / (equity + debt))
+    peso_deuda = 1.0 - peso_equity
+    return peso_equity * cost_of_equity + peso_deuda * cost_of_debt * (1.0 - tax_rate)
+
+
 def calcular_wacc(beta, debt, equity, cost_of_debt, tax_rate, risk_free_rate=0.0441, market_return=0.08):
     """Calcula el WACC con fórmula tradicional."""
-    cost_of_equity = risk_free_rate + beta * (market_return - risk_free_rate)
     if equity + debt == 0:
         return None  # No se puede calcular: DCF aguas abajo retornará None
-    return (equity / (equity + debt)) * cost_of_equity + (debt / (equity + debt)) * cost_of_debt * (1 - tax_rate)
+    return float(_wacc_core(
+        float(beta), float(debt), float(equity), float(cost_of_debt),
+        float(tax_rate), float(risk_free_rate), float(market_return),
+    ))
+
+# Kernels compilados con numba (solo si está instalado). Son bucles explícitos
+# con la misma aritmética que las versiones Python, sin fastmath, para que el
+# resultado no cambie según haya o no numba en el entorno.
+
+
+@njit(cache=True)
+def _proyectar_fcf_core(fcf_actual, tasa, años):
+    proyecciones = np.empty(años, dtype=np.float64)
+    prev_prev = fcf_actual
+    prev = fcf_actual
+    for i in range(años):
+        if i == 0:
+            if fcf_actual > 0:
+                fcf = fcf_actual * (1 + tasa)
+            else:
+                fcf = (-fcf_actual * tasa) + fcf_actual
+        elif prev > 0:
+            fcf = prev * (1 + tasa)
+        else:
+            fcf = ((prev - prev_prev) * (1 + tasa)) + prev
+        proyecciones[i] = fcf
+        prev_prev = prev
+        prev = fcf
+    return proyecciones
+
+
+@njit(cache=True)
+def _valor_intrinseco_core(flujos, wacc, crecimiento):
+    uno_mas_wacc = 1.0 + wacc
+    vp_fcf = 0.0
+    descuento = 1.0
+    for i in range(flujos.shape[0]):
+        descuento *= uno_mas_wacc
+        vp_fcf += flujos[i] / descuento
+    valor_residual = (flujos[-1] * (1 + crecimiento)) / (wacc - crecimiento)
+    return vp_fcf + valor_residual / descuento
 
 # Proyecta el Free Cash Flow (FCF) a futuro
 
 
 def proyectar_fcf(fcf_actual, tasa_crecimiento, años=5):
     """Proyecta el FCF a futuro respetando el comportamiento según si es positivo o negativo."""
+    if _HAS_NUMBA:
+        return _proyectar_fcf_core(float(fcf_actual), float(tasa_crecimiento), max(int(años), 0)).tolist()
+
+    if fcf_actual > 0 and 1 + tasa_crecimiento > 0:
+        # Todos los años quedan positivos: FCF_i = FCF_{i-1} × (1 + g) es un
+        # producto acumulado. El primer elemento es fcf_actual para multiplicar
+        # en el mismo orden que el bucle y obtener exactamente los mismos floats.
+        factores = np.full(max(años, 0) + 1, 1 + tasa_crecimiento, dtype=np.float64)
+        factores[0] = fcf_actual
+        return np.cumprod(factores)[1:].tolist()
+
     proyecciones = []
     for i in range(años):
         if i == 0:
@@ -75,11 +180,13 @@ def proyectar_fcf(fcf_actual, tasa_crecimiento, años=5):
 
 def calcular_crecimientos(fcf_series):
     if fcf_series is None:
-        valores = []
+        valores = np.empty(0, dtype=np.float64)
     elif hasattr(fcf_series, "dropna"):
-        valores = [float(v) for v in fcf_series.dropna().tolist()]
+        valores = fcf_series.dropna().to_numpy(dtype=np.float64)
     else:
-        valores = [float(v) for v in fcf_series if v is not None]
+        valores = np.fromiter(
+            (float(v) for v in fcf_series if v is not None), dtype=np.float64
+        )
 
     def sanitize(valor, default=0.05):
         if valor is None:
@@ -94,35 +201,32 @@ def calcular_crecimientos(fcf_series):
             return default
         return valor
 
-    if len(valores) > 1:
-        primero = valores[0]
-        ultimo = valores[-1]
+    if valores.size > 1:
+        primero = float(valores[0])
+        ultimo = float(valores[-1])
         cagr_calc = None
 
         # Si todos los FCF son negativos el CAGR no es interpretable — no usar fallback
-        todos_negativos = all(v <= 0 for v in valores)
+        todos_negativos = bool(np.all(valores <= 0))
         if todos_negativos:
             return None, None
 
-        if ultimo not in (0, None) and ultimo != 0 and primero > 0 and ultimo > 0:
+        if primero > 0 and ultimo > 0:
             try:
-                exponente = 1 / (len(valores) - 1)
+                exponente = 1 / (valores.size - 1)
                 ratio = primero / ultimo
                 if ratio > 0:
                     cagr_calc = (ratio ** exponente) - 1
             except (ZeroDivisionError, OverflowError, ValueError):
                 cagr_calc = None
 
-        valores_cronologicos = list(reversed(valores))
-        tasas: list[float] = []
-        for anterior, actual in zip(valores_cronologicos, valores_cronologicos[1:]):
-            denominador = abs(anterior)
-            if not denominador:
-                continue
-            variacion = (actual - anterior) / denominador
-            tasas.append(variacion)
+        # Variaciones año a año en orden cronológico, omitiendo bases en cero
+        cronologicos = valores[::-1]
+        denominadores = np.abs(cronologicos[:-1])
+        validos = denominadores != 0
+        tasas = np.diff(cronologicos)[validos] / denominadores[validos]
 
-        promedio_calc = (sum(tasas) / len(tasas)) if tasas else None
+        promedio_calc = (tasas.sum() / tasas.size) if tasas.size else None
         cagr = sanitize(cagr_calc)
         promedio = sanitize(promedio_calc)
     else:
@@ -265,14 +369,16 @@ def calcular_valor_intrinseco(fcf_proyectado, wacc, crecimiento_perpetuo=G_TERMI
     if not fcf_proyectado or wacc is None or wacc <= 0:
         return None
 
-    vp_fcf = sum(
-        fcf / ((1 + wacc) ** i)
-        for i, fcf in enumerate(fcf_proyectado, start=1)
-    )
-
+    flujos = np.asarray(fcf_proyectado, dtype=np.float64)
     crecimiento_ajustado = min(crecimiento_perpetuo, wacc - 0.005) if wacc > crecimiento_perpetuo else None
     if crecimiento_ajustado is None or crecimiento_ajustado < 0:
         return None
+    if _HAS_NUMBA:
+        return float(_valor_intrinseco_core(flujos, float(wacc), float(crecimiento_ajustado)))
+
+    # (1 + wacc)^i por multiplicación acumulada; el último factor descuenta el valor residual
+    descuentos = np.cumprod(np.full(len(flujos), 1.0 + wacc))
+    vp_fcf = float(np.dot(flujos, 1 / descuentos))
 
     fcf_final = fcf_proyectado[-1]
     try:
@@ -280,5 +386,103 @@ def calcular_valor_intrinseco(fcf_proyectado, wacc, crecimiento_perpetuo=G_TERMI
     except ZeroDivisionError:
         return None
 
-    valor_residual_desc = valor_residual / ((1 + wacc) ** len(fcf_proyectado))
+    valor_residual_desc = valor_residual / float(descuentos[-1])
     return vp_fcf + valor_residual_desc
+
+
+# Monte Carlo: valor intrínseco para muchas combinaciones (crecimiento, WACC, g)
+
+
+@njit(parallel=True, cache=True)
+def _mc_valor_intrinseco_core(fcf_actual, tasas, waccs, crec_perpetuos, años):
+    n = tasas.shape[0]
+    resultado = np.empty(n, dtype=np.float64)
+    for k in prange(n):
+        tasa = tasas[k]
+        wacc = waccs[k]
+        crecimiento = crec_perpetuos[k]
+        if años <= 0 or not wacc > 0 or not wacc > crecimiento:
+            resultado[k] = np.nan
+            continue
+        crecimiento = min(crecimiento, wacc - 0.005)
+        if crecimiento < 0:
+            resultado[k] = np.nan
+            continue
+
+        # Misma recurrencia que proyectar_fcf + calcular_valor_intrinseco
+        prev_prev = fcf_actual
+        prev = fcf_actual
+        uno_mas_wacc = 1.0 + wacc
+        descuento = 1.0
+        vp_fcf = 0.0
+        for i in range(años):
+            if i == 0:
+                if fcf_actual > 0:
+                    fcf = fcf_actual * (1 + tasa)
+                else:
+                    fcf = (-fcf_actual * tasa) + fcf_actual
+            elif prev > 0:
+                fcf = prev * (1 + tasa)
+            else:
+                fcf = ((prev - prev_prev) * (1 + tasa)) + prev
+            prev_prev = prev
+            prev = fcf
+            descuento *= uno_mas_wacc
+            vp_fcf += fcf / descuento
+        valor_residual = (prev * (1 + crecimiento)) / (wacc - crecimiento)
+        resultado[k] = vp_fcf + valor_residual / descuento
+    return resultado
+
+
+def _mc_valor_intrinseco_np(fcf_actual, tasas, waccs, crec_perpetuos, años):
+    """Versión NumPy: itera los años y vectoriza sobre los escenarios."""
+    n = tasas.shape[0]
+    if años <= 0:
+        return np.full(n, np.nan)
+    crecimiento = np.minimum(crec_perpetuos, waccs - 0.005)
+    validos = (waccs > 0) & (waccs > crec_perpetuos) & (crecimiento >= 0)
+
+    uno_mas_tasa = 1 + tasas
+    prev_prev = np.full(n, fcf_actual)
+    prev = prev_prev.copy()
+    uno_mas_wacc = 1.0 + waccs
+    descuento = np.ones(n)
+    vp_fcf = np.zeros(n)
+    for i in range(años):
+        if i == 0:
+            if fcf_actual > 0:
+                fcf = fcf_actual * uno_mas_tasa
+            else:
+                fcf = (-fcf_actual * tasas) + fcf_actual
+        else:
+            fcf = np.where(prev > 0, prev * uno_mas_tasa, ((prev - prev_prev) * uno_mas_tasa) + prev)
+        prev_prev, prev = prev, fcf
+        descuento = descuento * uno_mas_wacc
+        vp_fcf = vp_fcf + fcf / descuento
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        valor_residual = (prev * (1 + crecimiento)) / (waccs - crecimiento)
+        valores = vp_fcf + valor_residual / descuento
+    return np.where(validos, valores, np.nan)
+
+
+def mc_valor_intrinseco(fcf_actual, tasas, waccs, crec_perpetuos=G_TERMINAL, años=5):
+    """
+    Valor intrínseco (empresa) para cada escenario de una simulación Monte Carlo.
+
+    tasas, waccs y crec_perpetuos son arrays (o escalares) que se alinean por
+    broadcasting; cada posición k equivale a
+    calcular_valor_intrinseco(proyectar_fcf(fcf_actual, tasas[k], años), waccs[k], crec_perpetuos[k]).
+    Los escenarios en los que esa función devolvería None quedan como NaN.
+    """
+    tasas, waccs, crec_perpetuos = (
+        np.ascontiguousarray(a, dtype=np.float64).ravel()
+        for a in np.broadcast_arrays(
+            np.asarray(tasas, dtype=np.float64),
+            np.asarray(waccs, dtype=np.float64),
+            np.asarray(crec_perpetuos, dtype=np.float64),
+        )
+    )
+    if _HAS_NUMBA:
+        return _mc_valor_intrinseco_core(float(fcf_actual), tasas, waccs, crec_perpetuos, int(años))
+    return _mc_valor_intrinseco_np(float(fcf_actual), tasas, waccs, crec_perpetuos, int(años))
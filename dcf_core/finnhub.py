@@ -2,14 +2,35 @@
 
 from __future__ import annotations
 
+import itertools
 import os
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 import requests
+import urllib3
 
-from .utils import parse_datetime_epoch
+# ijson es opcional: permite parsear la respuesta en streaming y cortar en
+# cuanto hay suficientes noticias, sin bufferizar el cuerpo completo
+try:
+    import ijson
+    _HAS_IJSON = True
+    _JSON_ERRORS: tuple = (ValueError, ijson.JSONError)
+except ImportError:
+    _HAS_IJSON = False
+    _JSON_ERRORS = (ValueError,)
+
+from .http_cache import FileCache
+from .utils import cargar_json, crear_sesion_http, fragmento_error, parse_datetime_epoch
+
+_NEWS_URL = "https://finnhub.io/api/v1/company-news"
+# Las noticias dentro de la ventana de lookback cambian poco en minutos
+_NEWS_CACHE = FileCache("finnhub")
+_NEWS_CACHE_TTL_SECONDS = 10 * 60
+_SESSION = crear_sesion_http()
 
 
 class FinnhubError(RuntimeError):
@@ -28,6 +49,7 @@ class FinnhubNewsItem:
     published_at: Optional[datetime]
 
 
+@lru_cache(maxsize=1)
 def _get_api_key() -> str:
     key = os.environ.get("FINNHUB_API_KEY", "").strip()
     if not key:
@@ -38,6 +60,42 @@ def _get_api_key() -> str:
 
 
 
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=8)
+def _rango_fechas(dia_utc: int, lookback_dias: int) -> Tuple[str, str]:
+    """(desde, hasta) en ISO para el día UTC ``dia_utc`` (días desde epoch)."""
+    hoy = date.fromordinal(_EPOCH_ORDINAL + dia_utc)
+    return (hoy - timedelta(days=lookback_dias)).isoformat(), hoy.isoformat()
+
+
+def _leer_noticias_stream(respuesta, tope: Optional[int]) -> Optional[list]:
+    """Parsea el array de noticias en streaming y corta tras ``tope`` válidas.
+
+    Devuelve None si el JSON no es un array en el nivel superior.
+    """
+    respuesta.raw.decode_content = True
+    eventos = ijson.parse(respuesta.raw, use_float=True)
+    primero = next(eventos, None)
+    if primero is None or primero[1] != "start_array":
+        return None
+
+    data: list = []
+    for item in ijson.items(itertools.chain([primero], eventos), "item"):
+        data.append(item)
+        if (
+            tope is not None
+            and isinstance(item, dict)
+            and (item.get("headline") or item.get("title"))
+            and item.get("url")
+        ):
+            tope -= 1
+            if tope <= 0:
+                break
+    return data
+
+
 def obtener_noticias_finnhub(ticker: str, limite: int = 6, lookback_dias: int = 45) -> List[FinnhubNewsItem]:
     """Recupera noticias de Finnhub para un ticker dado en un rango temporal reciente."""
 
@@ -46,67 +104,82 @@ def obtener_noticias_finnhub(ticker: str, limite: int = 6, lookback_dias: int =
         raise FinnhubError("El ticker proporcionado no es válido.")
 
     api_key = _get_api_key()
-    ahora = datetime.now(timezone.utc)
-    desde = ahora - timedelta(days=max(lookback_dias, 1))
+    # Las fechas solo cambian una vez por día UTC
+    desde, hasta = _rango_fechas(int(time.time() // 86400), max(lookback_dias, 1))
 
     params = {
         "symbol": ticker,
-        "from": desde.date().isoformat(),
-        "to": ahora.date().isoformat(),
+        "from": desde,
+        "to": hasta,
         "token": api_key,
     }
 
-    url = "https://finnhub.io/api/v1/company-news"
-    try:
-        respuesta = requests.get(url, params=params, timeout=15)
-    except requests.RequestException as exc:  # pragma: no cover - dependiente de red
-        raise FinnhubError(f"No se pudieron obtener noticias de Finnhub ({exc}).") from exc
-
-    if respuesta.status_code == 429:
-        raise FinnhubError("Finnhub devolvió 429 (rate limit excedido). Intenta nuevamente en unos minutos.")
-
-    if respuesta.status_code == 401:
-        raise FinnhubError("Finnhub devolvió 401 (token inválido o expirado). Verificá FINNHUB_API_KEY.")
-
-    if respuesta.status_code != 200:
-        raise FinnhubError(
-            f"Finnhub devolvió un error inesperado ({respuesta.status_code}: {respuesta.text.strip()[:200]})."
-        )
-
-    try:
-        data = respuesta.json()
-    except ValueError as exc:  # pragma: no cover - depende del proveedor
-        raise FinnhubError("Finnhub devolvió un cuerpo no válido al solicitar noticias.") from exc
-
-    if not isinstance(data, list):
-        raise FinnhubError("Finnhub devolvió un formato inesperado para las noticias.")
-
-    elementos: List[FinnhubNewsItem] = []
-    for item in data:
-        if not isinstance(item, dict):
-            continue
-        titulo = (item.get("headline") or item.get("title") or "").strip()
-        enlace = (item.get("url") or "").strip()
-        if not titulo or not enlace:
-            continue
-
-        fuente = (item.get("source") or item.get("publisher") or "").strip() or None
-        resumen = (item.get("summary") or item.get("text") or "").strip() or None
-        imagen = (item.get("image") or item.get("thumbnail") or "").strip() or None
-        publicado = parse_datetime_epoch(item.get("datetime") or item.get("publishedTime"))
-
-        elementos.append(
-            FinnhubNewsItem(
-                title=titulo,
-                source=fuente,
-                summary=resumen,
-                url=enlace,
-                image=imagen,
-                published_at=publicado,
-            )
+    # Finnhub devuelve las noticias de más reciente a más antigua: en streaming
+    # basta leer el doble del límite para ordenar y recortar sobre ese subconjunto
+    tope = 2 * limite if limite > 0 else None
+
+    def _descargar() -> list:
+        try:
+            respuesta = _SESSION.get(_NEWS_URL, params=params, timeout=15, stream=_HAS_IJSON)
+        except requests.RequestException as exc:  # pragma: no cover - dependiente de red
+            raise FinnhubError(f"No se pudieron obtener noticias de Finnhub ({exc}).") from exc
+
+        # En streaming la conexión vuelve al pool recién al cerrar la respuesta,
+        # así que se cierra también en los errores de status
+        try:
+            if respuesta.status_code == 429:
+                raise FinnhubError("Finnhub devolvió 429 (rate limit excedido). Intenta nuevamente en unos minutos.")
+
+            if respuesta.status_code == 401:
+                raise FinnhubError("Finnhub devolvió 401 (token inválido o expirado). Verificá FINNHUB_API_KEY.")
+
+            if respuesta.status_code != 200:
+                raise FinnhubError(
+                    f"Finnhub devolvió un error inesperado ({respuesta.status_code}: {fragmento_error(respuesta)})."
+                )
+
+            if _HAS_IJSON:
+                data = _leer_noticias_stream(respuesta, tope)
+            else:
+                data = cargar_json(respuesta.content)
+        except _JSON_ERRORS as exc:  # pragma: no cover - depende del proveedor
+            raise FinnhubError("Finnhub devolvió un cuerpo no válido al solicitar noticias.") from exc
+        except (urllib3.exceptions.HTTPError, requests.RequestException) as exc:
+            # Corte o timeout de lectura a mitad del cuerpo (en streaming llega como error de urllib3)
+            raise FinnhubError(f"Se interrumpió la lectura de noticias de Finnhub ({exc}).") from exc
+        finally:
+            respuesta.close()
+
+        if not isinstance(data, list):
+            raise FinnhubError("Finnhub devolvió un formato inesperado para las noticias.")
+        return data
+
+    # El tope forma parte de la clave: una lectura parcial no sirve a un límite mayor
+    data = _NEWS_CACHE.get_or_fetch(
+        _NEWS_URL, {**params, "tope": tope}, _NEWS_CACHE_TTL_SECONDS, _descargar
+    )
+
+    elementos: List[FinnhubNewsItem] = [
+        FinnhubNewsItem(
+            title=titulo,
+            source=(item.get("source") or item.get("publisher") or "").strip() or None,
+            summary=(item.get("summary") or item.get("text") or "").strip() or None,
+            url=enlace,
+            image=(item.get("image") or item.get("thumbnail") or "").strip() or None,
+            published_at=parse_datetime_epoch(item.get("datetime") or item.get("publishedTime")),
         )
-
-    elementos.sort(key=lambda n: (n.published_at is None, n.published_at and -n.published_at.timestamp()))
+        for item in data
+        if isinstance(item, dict)
+        and (titulo := (item.get("headline") or item.get("title") or "").strip())
+        and (enlace := (item.get("url") or "").strip())
+    ]
+
+    # Más recientes primero y sin fecha al final; clave numérica calculada una vez por noticia
+    claves = [
+        (n.published_at is None, -n.published_at.timestamp() if n.published_at else 0.0)
+        for n in elementos
+    ]
+    orden = sorted(range(len(elementos)), key=claves.__getitem__)
     if limite > 0:
-        elementos = elementos[:limite]
-    return elementos
+        orden = orden[:limite]
+    return [elementos[i] for i in orden]
@@ -2,19 +2,253 @@
 
 from __future__ import annotations
 
+import copy
+import functools
+import inspect
+import itertools
+import logging
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import requests
+try:
+    import ijson
+    _HAS_IJSON = True
+except ImportError:  # sin ijson se parsea el cuerpo completo y se recorta después
+    _HAS_IJSON = False
+
+try:
+    import ciso8601 as _ciso8601
+    _HAS_CISO8601 = True
+except ImportError:
+    _HAS_CISO8601 = False
+
+from .http_cache import FileCache
+from .utils import CacheTTL, cargar_json, crear_sesion_http, primer_valor, ttl_cache
+
+if TYPE_CHECKING:
+    import numpy as np
+    import requests
+
+logger = logging.getLogger(__name__)
+
+
+def _requests():
+    # requests se importa en el primer uso (la sesión la crea crear_sesion_http)
+    import requests
+
+    return requests
+
+
+@functools.lru_cache(maxsize=1)
+def _numpy():
+    # NumPy también es solo para las métricas derivadas: importar fmp no lo carga
+    import numpy
+
+    return numpy
+
+
+@functools.lru_cache(maxsize=1)
+def _pandas():
+    # pandas solo lo necesitan las métricas derivadas: se importa en el primer uso
+    # y las llamadas siguientes devuelven el módulo sin pasar por el import
+    import pandas
+
+    return pandas
+
+
+@functools.lru_cache(maxsize=1)
+def _errores_cuerpo() -> tuple:
+    """Errores posibles al leer/decodificar el cuerpo (JSON inválido o truncado, corte de red)."""
+    import urllib3
+
+    errores = (ValueError, urllib3.exceptions.HTTPError, _requests().RequestException)
+    return errores + (ijson.JSONError,) if _HAS_IJSON else errores
+
+
+def __getattr__(name: str):
+    # PEP 562: mantiene disponible ``dcf_core.fmp.requests`` sin importarlo al cargar el módulo
+    if name == "requests":
+        return _requests()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Caché en disco de respuestas exitosas (listas) por endpoint + parámetros
+_FMP_CACHE = FileCache("fmp")
+_TTL_ESTADOS = 24 * 60 * 60
+_TTL_NOTICIAS = 15 * 60
+_TTL_BUSQUEDA = 60 * 60  # el listado de un prefijo cambia poco, pero no es estático
+_FMP_TIMEOUT = (5, 15)
+
+
+def _ttl_endpoint(endpoint: str) -> int:
+    if "stock_news" in endpoint:
+        return _TTL_NOTICIAS
+    if "search" in endpoint:
+        return _TTL_BUSQUEDA
+    return _TTL_ESTADOS  # estados financieros y perfil
+
+
+def _cache_fmp_deshabilitado() -> bool:
+    return os.environ.get("FMP_CACHE_DISABLE", "").strip().lower() in ("1", "true", "yes")
+
+
+# Campos de noticias: clave principal seguida de alternativas, en orden
+_NEWS_FIELDS = (
+    ("title",),
+    ("url", "link"),
+    ("site", "source"),
+    ("text", "summary"),
+    ("image", "imageUrl"),
+    ("publishedDate", "date"),
+)
+# Único subconjunto del cash flow que usa get_free_cash_flow_history
+_CAMPOS_FCF = ("freeCashFlow", "calendarYear", "date")
+_FECHA_ISO_RE = re.compile(r"^\d{4}-?\d{2}-?\d{2}")
+
+
+def _to_float(valor) -> Optional[float]:
+    """Convierte a float; None si falta, está vacío o no es numérico."""
+    if valor is None or valor == "":
+        return None
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _recortar_registro(registro, campos: Optional[tuple]):
+    if campos is None or not isinstance(registro, dict):
+        return registro
+    return {campo: registro[campo] for campo in campos if campo in registro}
+
+
+def _recortar_lista(data, tope: Optional[int], campos: Optional[tuple]):
+    if not isinstance(data, list):
+        return data
+    if tope is not None:
+        data = data[:tope]
+    return [_recortar_registro(registro, campos) for registro in data]
+
+
+def _leer_json_stream(respuesta, tope: Optional[int], campos: Optional[tuple]):
+    """Parsea el cuerpo con ijson y, si es un array, corta tras ``tope`` elementos.
+
+    Los objetos de nivel superior (errores de FMP como "Legacy Endpoint") se
+    devuelven completos para que el llamador los interprete igual que antes.
+    """
+    respuesta.raw.decode_content = True
+    eventos = ijson.parse(respuesta.raw, use_float=True)
+    primero = next(eventos, None)
+    if primero is None:
+        raise ValueError("Financial Modeling Prep devolvió un cuerpo vacío.")
+    eventos = itertools.chain([primero], eventos)
+    if primero[1] != "start_array":
+        return next(ijson.items(eventos, ""))
+
+    data: list = []
+    if tope is not None and tope <= 0:
+        return data
+    for registro in ijson.items(eventos, "item"):
+        data.append(_recortar_registro(registro, campos))
+        if tope is not None and len(data) >= tope:
+            break
+    return data
+
+
+def _texto_o_none(valor) -> Optional[str]:
+    return (valor.strip() or None) if valor else None
+
+
+def _parsear_fecha_noticia(valor) -> Optional[datetime]:
+    if not valor:
+        return None
+    texto_fecha = str(valor).strip()
+    # Sin prefijo AAAA-MM-DD (o AAAAMMDD) ninguno de los dos formatos puede interpretarlo
+    if not _FECHA_ISO_RE.match(texto_fecha):
+        return None
+    if _HAS_CISO8601:
+        # ciso8601 acepta "Z" y el separador de espacio sin normalizar el texto
+        try:
+            return _ciso8601.parse_datetime(texto_fecha)
+        except ValueError:
+            try:
+                return _ciso8601.parse_datetime(texto_fecha[:19])
+            except ValueError:
+                return None
+    try:
+        return datetime.fromisoformat(texto_fecha.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            return datetime.strptime(texto_fecha[:19], "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+
+
+# Memo en proceso de los métodos del cliente: evita re-parsear la misma
+# respuesta cuando varias funciones obtener_* piden los mismos estados
+_MEMO_TTL_SECONDS = 10 * 60
+_MEMO_MAXSIZE = 256
+
+
+def _normalizar_argumento(nombre: str, valor):
+    if isinstance(valor, str):
+        if nombre == "ticker":
+            return valor.upper().strip()
+        if nombre == "query":
+            return valor.strip().lower()
+    return valor
+
+
+def _copiar_resultado(resultado: list) -> list:
+    # Los dataclasses son inmutables; los statements (dicts) se copian para que
+    # el llamador no modifique la entrada del memo
+    return [copy.deepcopy(r) if isinstance(r, dict) else r for r in resultado]
+
+
+def _memoizar(func):
+    """Cachea el resultado (lista) por (api_key, método, argumentos) y devuelve copias.
+
+    Los argumentos se normalizan (``ticker`` en mayúsculas, ``query`` en
+    minúsculas, posicionales y por nombre por igual). Con ``cache=False`` se
+    ignora la entrada vigente y se reemplaza por el resultado nuevo (el kwarg
+    se pasa tal cual al método).
+    """
+    firma = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        argumentos = firma.bind(self, *args, **kwargs)
+        argumentos.apply_defaults()
+        clave = (
+            self._api_key,
+            func.__name__,
+            tuple(
+                (nombre, _normalizar_argumento(nombre, valor))
+                for nombre, valor in argumentos.arguments.items()
+                if nombre not in ("self", "cache")
+            ),
+        )
+        if kwargs.get("cache", True):
+            cacheado = FMPClient._MEMO.get(clave)
+            if cacheado is not None:
+                return _copiar_resultado(cacheado)
+        resultado = func(self, *args, **kwargs)
+        FMPClient._MEMO.set(clave, _copiar_resultado(resultado))
+        return list(resultado)
+
+    return wrapper
 
 
 class FMPClientError(RuntimeError):
     """Raised when the Financial Modeling Prep client cannot fulfil a request."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FCFEntry:
     """Represents a single historical free cash flow data point."""
 
@@ -23,7 +257,7 @@ class FCFEntry:
     date: Optional[str] = None  # YYYY-MM-DD real del statement (para FX histórico por fecha)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FMPDerivedMetrics:
     """Financial metrics derived from FMP statements."""
 
@@ -35,7 +269,7 @@ class FMPDerivedMetrics:
     nota_estructura_capital: Optional[str] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FMPSearchResult:
     """Represents a single match from the FMP search endpoint."""
 
@@ -45,7 +279,7 @@ class FMPSearchResult:
     asset_type: Optional[str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FMPNewsItem:
     """Represents a single news entry for a ticker."""
 
@@ -61,30 +295,114 @@ class FMPClient:
     """Very small helper around the Financial Modeling Prep REST API."""
 
     _BASE_URL = "https://financialmodelingprep.com"
-
-    def __init__(self, api_key: Optional[str] = None, session: Optional[requests.Session] = None) -> None:
+    _URL_PREFIX = f"{_BASE_URL}/"
+    _MEMO = CacheTTL(maxsize=_MEMO_MAXSIZE, ttl=_MEMO_TTL_SECONDS)
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        timeout: tuple = _FMP_TIMEOUT,
+    ) -> None:
         self._api_key = api_key or os.environ.get("FMP_API_KEY")
-        self._session = session or requests.Session()
+        self._timeout = timeout
+        self._session = session or crear_sesion_http(
+            pool_connections=4,
+            pool_maxsize=16,
+            total_reintentos=3,
+            reintentos_conexion=3,
+            reintentos_lectura=3,
+            backoff_factor=1.0,
+            headers={"User-Agent": "dcf-core/1.0"},
+        )
+        # Par precalculado: se agrega al final de la query sin copiar el dict de params
+        self._apikey_param = ("apikey", self._api_key)
         if not self._api_key:
             raise FMPClientError(
                 "No se encontró la clave de API para Financial Modeling Prep. "
                 "Define la variable de entorno FMP_API_KEY antes de ejecutar el análisis."
             )
 
-    def _request(self, endpoint: str, params: Optional[dict] = None):
-        params = params.copy() if params else {}
-        params["apikey"] = self._api_key
-        url = f"{self._BASE_URL}/{endpoint}"
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Vacía el memo en proceso de todos los clientes (no toca el caché en disco)."""
+        cls._MEMO.clear()
+
+    def _request(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        leer_cache: bool = True,
+        tope: Optional[int] = None,
+        campos: Optional[tuple] = None,
+    ):
+        """GET a FMP con caché en disco; ``leer_cache=False`` fuerza la descarga y refresca la entrada.
+
+        Con ``tope``/``campos`` una respuesta de tipo lista se limita a los primeros
+        ``tope`` registros y a esas claves; con ijson instalado se parsea en
+        streaming y se deja de leer el cuerpo al llegar al tope.
+        """
+        params = params or {}
+        url = self._URL_PREFIX + endpoint
+        recorte = tope is not None or campos is not None
+        # Una respuesta recortada no debe pisar la entrada completa del mismo endpoint
+        clave_cache = (
+            {**params, "tope": tope, "campos": list(campos or ())} if recorte else params
+        )
+
+        usar_cache = not _cache_fmp_deshabilitado()
+        # La apikey no forma parte de la clave del caché (FileCache la excluiría igual)
+        if usar_cache and leer_cache:
+            cacheado = _FMP_CACHE.get(url, clave_cache, _ttl_endpoint(endpoint))
+            if cacheado is not None:
+                return cacheado
+
+        streaming = recorte and _HAS_IJSON
+        response = None
         try:
-            response = self._session.get(url, params=params, timeout=15)
+            # (conexión, lectura): un host caído falla rápido sin acortar respuestas lentas
+            response = self._session.get(
+                url,
+                params=[*params.items(), self._apikey_param],
+                timeout=self._timeout,
+                stream=streaming,
+            )
+            # Con los reintentos agotados la sesión devuelve la última respuesta
             response.raise_for_status()
-        except requests.RequestException as exc:
+        except _requests().RequestException as exc:
+            # En streaming la conexión vuelve al pool recién al cerrar la respuesta
+            if response is not None:
+                response.close()
             raise FMPClientError(
                 f"No se pudo obtener información de Financial Modeling Prep ({exc})."
             ) from exc
 
-        return response.json()
+        try:
+            if streaming:
+                data = _leer_json_stream(response, tope, campos)
+            else:
+                # orjson (si está instalado) decodifica directo desde bytes, sin pasar por str
+                data = cargar_json(response.content)
+                if recorte:
+                    data = _recortar_lista(data, tope, campos)
+        except _errores_cuerpo() as exc:
+            raise FMPClientError(
+                f"Financial Modeling Prep devolvió una respuesta incompleta o inválida ({exc})."
+            ) from exc
+        finally:
+            response.close()
+        # Solo se cachean listas: FMP reporta errores (p.ej. "Legacy Endpoint") como dict
+        if usar_cache and isinstance(data, list):
+            _FMP_CACHE.set(url, clave_cache, data)
+        return data
 
+    def _get_stable(self, recurso: str, params: Optional[dict] = None, leer_cache: bool = True, **opciones):
+        return self._request("stable/" + recurso, params, leer_cache, **opciones)
+
+    def _get_v3(self, recurso: str, params: Optional[dict] = None, leer_cache: bool = True, **opciones):
+        return self._request("api/v3/" + recurso, params, leer_cache, **opciones)
+
+    @_memoizar
     def search_companies(self, query: str, limit: int = 8) -> List[FMPSearchResult]:
         """Return a list of companies matching the query by ticker or name."""
 
@@ -93,8 +411,9 @@ class FMPClient:
             return []
 
         effective_limit = min(max(limit, 1), 20)
-        params = {"query": cleaned_query, "limit": effective_limit}
-        data = self._request("api/v3/search", params=params)
+        # La búsqueda de FMP no distingue mayúsculas: "AAPL" y "aapl" comparten caché
+        params = {"query": cleaned_query.lower(), "limit": effective_limit}
+        data = self._get_v3("search", params)
 
         if isinstance(data, dict):
             error_message = data.get("Error Message") or data.get("error")
@@ -128,21 +447,37 @@ class FMPClient:
 
         return resultados
 
-    def get_cash_flow_statements(self, ticker: str, limit: int = 10) -> list:
-        """Return raw annual cash-flow statements for the given ticker."""
+    @_memoizar
+    def get_cash_flow_statements(
+        self,
+        ticker: str,
+        limit: int = 10,
+        cache: bool = True,
+        campos: Optional[tuple] = None,
+    ) -> list:
+        """Return raw annual cash-flow statements for the given ticker.
+
+        Responses are cached in memory and on disk (24h); ``cache=False`` skips
+        both lookups and refreshes them with a new download. With ``campos``
+        each statement keeps only those keys and parsing stops after ``limit``
+        records.
+        """
         ticker = ticker.upper().strip()
         if not ticker:
             raise FMPClientError("El ticker proporcionado no es válido.")
         effective_limit = min(limit, 5)
         params = {"symbol": ticker, "period": "annual", "limit": effective_limit}
-        data = self._request("stable/cash-flow-statement", params=params)
+        recorte = {"tope": effective_limit, "campos": campos} if campos is not None else {}
+        data = self._get_stable("cash-flow-statement", params, leer_cache=cache, **recorte)
 
         if isinstance(data, dict):
             error_message = data.get("Error Message") or data.get("error")
             if error_message and "Legacy Endpoint" in str(error_message):
-                data = self._request(
-                    f"api/v3/cash-flow-statement/{ticker}",
-                    params={"period": "annual", "limit": effective_limit}
+                data = self._get_v3(
+                    f"cash-flow-statement/{ticker}",
+                    {"period": "annual", "limit": effective_limit},
+                    leer_cache=cache,
+                    **recorte,
                 )
             else:
                 raise FMPClientError(
@@ -156,13 +491,14 @@ class FMPClient:
 
         return data
 
+    @_memoizar
     def get_income_statements(self, ticker: str, limit: int = 5) -> list:
         """Return annual income statements."""
         ticker = ticker.upper().strip()
         if not ticker:
             raise FMPClientError("El ticker proporcionado no es válido.")
         params = {"symbol": ticker, "period": "annual", "limit": min(limit, 5)}
-        data = self._request("stable/income-statement", params=params)
+        data = self._get_stable("income-statement", params)
 
         if isinstance(data, dict):
             error_message = data.get("Error Message") or data.get("error")
@@ -177,13 +513,14 @@ class FMPClient:
 
         return data
 
+    @_memoizar
     def get_balance_sheet_statements(self, ticker: str, limit: int = 5) -> list:
         """Return annual balance sheet statements."""
         ticker = ticker.upper().strip()
         if not ticker:
             raise FMPClientError("El ticker proporcionado no es válido.")
         params = {"symbol": ticker, "period": "annual", "limit": min(limit, 5)}
-        data = self._request("stable/balance-sheet-statement", params=params)
+        data = self._get_stable("balance-sheet-statement", params)
 
         if isinstance(data, dict):
             error_message = data.get("Error Message") or data.get("error")
@@ -198,35 +535,43 @@ class FMPClient:
 
         return data
 
+    @_memoizar
+    def get_financial_ratios(self, ticker: str, limit: int = 5) -> list:
+        """Return annual financial ratios (effectiveTaxRate, interestCoverageRatio, ...)."""
+        ticker = ticker.upper().strip()
+        if not ticker:
+            raise FMPClientError("El ticker proporcionado no es válido.")
+        params = {"symbol": ticker, "period": "annual", "limit": min(limit, 5)}
+        data = self._get_stable("ratios", params)
+
+        if isinstance(data, dict):
+            error_message = data.get("Error Message") or data.get("error")
+            raise FMPClientError(
+                f"Financial Modeling Prep devolvió un error al pedir los ratios: {error_message or data}."
+            )
+
+        if not isinstance(data, list):
+            raise FMPClientError(
+                "Financial Modeling Prep devolvió un formato inesperado al pedir los ratios."
+            )
+
+        return data
+
     def get_free_cash_flow_history(self, ticker: str, limit: int = 10) -> List[FCFEntry]:
         """Return a list of free cash flow entries (most recent first)."""
-        statements = self.get_cash_flow_statements(ticker, limit=limit)
+        statements = self.get_cash_flow_statements(ticker, limit=limit, campos=_CAMPOS_FCF)
         history: List[FCFEntry] = []
         for statement in statements:
-            raw_value = statement.get("freeCashFlow")
-            if raw_value in (None, ""):
-                continue
-            try:
-                value = float(raw_value)
-            except (TypeError, ValueError):
+            value = _to_float(statement.get("freeCashFlow"))
+            if value is None:
                 continue
 
-            year_value = statement.get("calendarYear") or ""
-            year: Optional[int]
             raw_date: Optional[str] = statement.get("date") or None
-            try:
-                year = int(year_value)
-            except (TypeError, ValueError):
-                # Algunos tickers devuelven "date" como AAAA-MM-DD
-                try:
-                    year = int(str(raw_date)[:4]) if raw_date else None
-                except (TypeError, ValueError):
-                    year = None
-
-            history.append(FCFEntry(year=year, value=value, date=raw_date))
+            history.append(FCFEntry(year=_extraer_año(statement), value=value, date=raw_date))
 
         return history
 
+    @_memoizar
     def get_company_news(self, ticker: str, limit: int = 8) -> List[FMPNewsItem]:
         """Return recent news for the provided ticker."""
 
@@ -236,7 +581,7 @@ class FMPClient:
 
         effective_limit = min(max(limit, 1), 50)
         params = {"tickers": ticker, "limit": effective_limit}
-        data = self._request("api/v3/stock_news", params=params)
+        data = self._get_v3("stock_news", params)
 
         if isinstance(data, dict):
             error_message = data.get("Error Message") or data.get("error")
@@ -251,45 +596,22 @@ class FMPClient:
 
         items: List[FMPNewsItem] = []
         for raw in data:
-            titulo = (raw.get("title") or "").strip()
-            enlace = (raw.get("url") or raw.get("link") or "").strip()
+            titulo, enlace, sitio, resumen, imagen, publicado_raw = (
+                primer_valor(raw, claves) for claves in _NEWS_FIELDS
+            )
+            titulo = (titulo or "").strip()
+            enlace = (enlace or "").strip()
             if not titulo or not enlace:
                 continue
 
-            sitio = (raw.get("site") or raw.get("source")) or None
-            if sitio:
-                sitio = sitio.strip() or None
-
-            resumen = (raw.get("text") or raw.get("summary") or None)
-            if resumen:
-                resumen = resumen.strip() or None
-
-            imagen = (raw.get("image") or raw.get("imageUrl") or None)
-            if imagen:
-                imagen = imagen.strip() or None
-
-            publicado_raw = raw.get("publishedDate") or raw.get("date") or ""
-            publicado = None
-            if publicado_raw:
-                texto_fecha = str(publicado_raw).strip()
-                if texto_fecha:
-                    normalizado = texto_fecha.replace("Z", "+00:00")
-                    try:
-                        publicado = datetime.fromisoformat(normalizado)
-                    except ValueError:
-                        try:
-                            publicado = datetime.strptime(texto_fecha[:19], "%Y-%m-%d %H:%M:%S")
-                        except ValueError:
-                            publicado = None
-
             items.append(
                 FMPNewsItem(
                     title=titulo,
-                    site=sitio,
-                    summary=resumen,
+                    site=_texto_o_none(sitio),
+                    summary=_texto_o_none(resumen),
                     url=enlace,
-                    image=imagen,
-                    published_at=publicado,
+                    image=_texto_o_none(imagen),
+                    published_at=_parsear_fecha_noticia(publicado_raw),
                 )
             )
 
@@ -301,7 +623,7 @@ class FMPClient:
         if not ticker:
             return {}
         try:
-            data = self._request(f"api/v3/profile/{ticker}", params={})
+            data = self._get_v3(f"profile/{ticker}")
             if isinstance(data, list) and data:
                 return data[0]
         except Exception:
@@ -309,10 +631,27 @@ class FMPClient:
         return {}
 
 
+_DEFAULT_CLIENT: Optional[FMPClient] = None
+_DEFAULT_CLIENT_LOCK = threading.Lock()
+
+
+def _get_default_client() -> FMPClient:
+    """Cliente compartido por las funciones obtener_* (una sola Session HTTP).
+
+    Se recrea si cambia FMP_API_KEY; sin clave lanza FMPClientError como FMPClient().
+    """
+    global _DEFAULT_CLIENT
+    api_key = os.environ.get("FMP_API_KEY")
+    with _DEFAULT_CLIENT_LOCK:
+        if _DEFAULT_CLIENT is None or _DEFAULT_CLIENT._api_key != api_key:
+            _DEFAULT_CLIENT = FMPClient(api_key=api_key)
+        return _DEFAULT_CLIENT
+
+
 def obtener_sector_empresa(ticker: str) -> tuple[str, str]:
     """Devuelve (sector, industria) desde FMP. Retorna ('', '') si no disponible."""
     try:
-        cliente = FMPClient()
+        cliente = _get_default_client()
         perfil = cliente.get_company_profile(ticker)
         sector = (perfil.get("sector") or "").strip()
         industria = (perfil.get("industry") or "").strip()
@@ -321,6 +660,32 @@ def obtener_sector_empresa(ticker: str) -> tuple[str, str]:
         return "", ""
 
 
+def _fcf_sort_key(entrada: FCFEntry) -> tuple[bool, int]:
+    """Más reciente primero y los años desconocidos al final (un solo acceso a .year)."""
+    año = entrada.year
+    return (año is None, -año if año is not None else 0)
+
+
+def _fcf_ordenado(historial: List[FCFEntry]) -> bool:
+    """True si los años ya están de más reciente a más antiguo, con los None al final."""
+    anterior: Optional[int] = None
+    visto_none = False
+    for entrada in historial:
+        año = entrada.year
+        if año is None:
+            visto_none = True
+        elif visto_none or (anterior is not None and año > anterior):
+            return False
+        else:
+            anterior = año
+    return True
+
+
+@ttl_cache(
+    maxsize=256,
+    ttl=60,
+    clave=lambda ticker, minimo=6, limite=10: ((ticker or "").upper().strip(), minimo, limite),
+)
 def obtener_fcf_historico(ticker: str, minimo: int = 6, limite: int = 10) -> List[FCFEntry]:
     """
     Recupera el historial de Free Cash Flow para un ticker utilizando Financial Modeling Prep.
@@ -328,10 +693,12 @@ def obtener_fcf_historico(ticker: str, minimo: int = 6, limite: int = 10) -> Lis
     Se retorna siempre la lista ordenada de más reciente a más antigua. Si la API devuelve
     menos puntos de los solicitados, se retornan los disponibles.
     """
-    cliente = FMPClient()
+    cliente = _get_default_client()
     historial = cliente.get_free_cash_flow_history(ticker, limit=limite)
-    # FMP ya devuelve los datos ordenados del más nuevo al más viejo, pero por las dudas
-    historial.sort(key=lambda item: (item.year is None, -(item.year or 0)))
+    # FMP ya devuelve los datos ordenados del más nuevo al más viejo: solo se
+    # reordena si la verificación lineal encuentra un par fuera de orden
+    if not _fcf_ordenado(historial):
+        historial.sort(key=_fcf_sort_key)
     if len(historial) < minimo:
         # No lanzamos excepción: dejamos que el flujo principal decida cómo proceder.
         return historial
@@ -341,7 +708,7 @@ def obtener_fcf_historico(ticker: str, minimo: int = 6, limite: int = 10) -> Lis
 def obtener_noticias_empresa(ticker: str, limite: int = 6) -> List[FMPNewsItem]:
     """Recupera las noticias más recientes de un ticker."""
 
-    cliente = FMPClient()
+    cliente = _get_default_client()
     return cliente.get_company_news(ticker, limit=limite)
 
 
@@ -352,37 +719,78 @@ def obtener_shares_diluidas_fmp(ticker: str) -> Optional[float]:
     Retorna None si no disponible o ante cualquier error.
     """
     try:
-        cliente = FMPClient()
-        statements = cliente.get_income_statements(ticker, limit=1)
+        cliente = _get_default_client()
+        # Mismo limit que obtener_metricas_financieras: comparte la entrada del memo
+        statements = cliente.get_income_statements(ticker, limit=5)
         if not statements:
             return None
         latest = statements[0]
-        raw = latest.get("weightedAverageShsOutDil")
-        if raw in (None, "", 0):
-            return None
-        val = float(raw)
-        return val if val > 0 else None
+        val = _to_float(latest.get("weightedAverageShsOutDil"))
+        return val if val is not None and val > 0 else None
     except Exception:
         return None
 
 
+def _year_from_date(fecha) -> Optional[int]:
+    """Año de una fecha "AAAA-MM-DD" (primeros cuatro caracteres); None si no son un entero."""
+    if not fecha:
+        return None
+    prefijo = (fecha if type(fecha) is str else str(fecha))[:4]
+    if prefijo.isascii() and prefijo.isdigit():
+        return int(prefijo)
+    try:  # casos raros (dígitos no ASCII, signo) con la misma semántica que int()
+        return int(prefijo)
+    except ValueError:
+        return None
+
+
 def _extraer_año(data: dict) -> Optional[int]:
-    """Obtiene el año numérico desde la respuesta de FMP."""
+    """Obtiene el año numérico desde la respuesta de FMP.
+
+    Usa ``calendarYear`` y, si falta o no es numérico, los primeros cuatro
+    caracteres de ``date``. Los casos habituales (entero o texto con dígitos
+    ASCII) se resuelven sin pasar por excepciones; el resto cae en ``int()``.
+    """
     raw_year = data.get("calendarYear")
     if raw_year:
+        tipo = type(raw_year)
+        if tipo is int:  # stable/ devuelve el año como entero
+            return raw_year
+        if tipo is str:
+            texto = raw_year.strip()
+            if texto.isascii() and texto.isdigit():
+                return int(texto)
         try:
             return int(raw_year)
         except (TypeError, ValueError):
             pass
 
-    raw_date = data.get("date")
-    if raw_date:
-        try:
-            return int(str(raw_date)[:4])
-        except (TypeError, ValueError):
-            pass
+    # Algunos tickers devuelven "date" como AAAA-MM-DD
+    return _year_from_date(data.get("date"))
+
 
-    return None
+def _numerico(
+    registros: list,
+    clave: str,
+    alternativa: Optional[str] = None,
+    solo_vacios: bool = False,
+) -> np.ndarray:
+    """Extrae ``clave`` de cada registro como float64 (NaN si falta o no es numérico).
+
+    Con ``alternativa`` se usa ese campo cuando el principal es falsy, o solo
+    cuando es None/"" si ``solo_vacios`` es True.
+    """
+    if alternativa is None:
+        valores = [r.get(clave) for r in registros]
+    elif solo_vacios:
+        valores = [
+            v if (v := r.get(clave)) not in (None, "") else r.get(alternativa) for r in registros
+        ]
+    else:
+        valores = [r.get(clave) or r.get(alternativa) for r in registros]
+    np, pd = _numpy(), _pandas()
+    serie = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce")
+    return serie.to_numpy(dtype=np.float64, na_value=np.nan)
 
 
 def _calcular_kd_con_floor(
@@ -402,9 +810,6 @@ def _calcular_kd_con_floor(
     Investment grade: D/E_proxy (deuda/equity_proxy) < 1.5 O cobertura de interés > 3.
     Sub-investment grade: cualquier otro caso.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-
     kd_calculado: Optional[float] = None
 
     if interes_float is not None and interes_float > 0 and deuda_financiera and deuda_financiera > 0:
@@ -444,20 +849,61 @@ def _calcular_kd_con_floor(
     return rf + credit_spread
 
 
+def _usar_ratios_fmp() -> bool:
+    return os.environ.get("FMP_USE_KEY_METRICS", "").strip().lower() in ("1", "true", "yes")
+
+
+def _tasas_desde_ratios(ratios: list) -> Dict[int, float]:
+    """effectiveTaxRate por año desde stable/ratios, con el mismo filtro que la reconstrucción."""
+    tasas: Dict[int, float] = {}
+    for ratio in ratios:
+        if not isinstance(ratio, dict):
+            continue
+        año = _extraer_año(ratio)
+        tasa = _to_float(ratio.get("effectiveTaxRate"))
+        if año is None or tasa is None:
+            continue
+        if 0 <= tasa < 1.5:
+            tasas[año] = tasa
+    return tasas
+
+
 def obtener_metricas_financieras(ticker: str, limite: int = 5) -> FMPDerivedMetrics:
-    """Calcula tasa efectiva y costo de deuda utilizando estados financieros de FMP."""
-    import logging
-    logger = logging.getLogger(__name__)
+    """Calcula tasa efectiva y costo de deuda utilizando estados financieros de FMP.
 
-    try:
-        from .finanzas import obtener_tasa_libre_riesgo
-        rf = obtener_tasa_libre_riesgo()
-    except Exception:
-        rf = 0.0441
+    Con FMP_USE_KEY_METRICS=1 la tasa efectiva de cada año se toma de
+    stable/ratios cuando está disponible; los años sin dato siguen usando
+    impuesto / resultado antes de impuestos del income statement.
+    """
+    # finanzas carga numba y sus kernels: se importa acá para que importar fmp siga siendo liviano
+    from .finanzas import obtener_tasa_libre_riesgo
+
+    np = _numpy()
+    cliente = _get_default_client()
+
+    # Las tres descargas son independientes: se solapan en hilos y la latencia
+    # total pasa a ser la de la más lenta en vez de la suma
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futuro_rf = executor.submit(obtener_tasa_libre_riesgo)
+        futuro_income = executor.submit(cliente.get_income_statements, ticker, limit=limite)
+        futuro_balance = executor.submit(cliente.get_balance_sheet_statements, ticker, limit=limite)
+        futuro_ratios = (
+            executor.submit(cliente.get_financial_ratios, ticker, limit=limite)
+            if _usar_ratios_fmp() else None
+        )
 
-    cliente = FMPClient()
-    income_statements = cliente.get_income_statements(ticker, limit=limite)
-    balance_statements = cliente.get_balance_sheet_statements(ticker, limit=limite)
+        income_statements = futuro_income.result()
+        balance_statements = futuro_balance.result()
+        try:
+            rf = futuro_rf.result()
+        except Exception:
+            rf = 0.0441
+        ratios: list = []
+        if futuro_ratios is not None:
+            try:
+                ratios = futuro_ratios.result()
+            except FMPClientError:
+                ratios = []  # los ratios son opcionales: se reconstruye desde el income
 
     # Moneda de reporte: tomar del primer income statement disponible
     reported_currency = "USD"
@@ -471,41 +917,28 @@ def obtener_metricas_financieras(ticker: str, limite: int = 5) -> FMPDerivedMetr
     total_debt_total: Optional[float] = None
     nota_estructura_capital: Optional[str] = None
 
-    balance_por_año: Dict[int, float] = {}
-    for balance in balance_statements:
-        año = _extraer_año(balance)
-        if año is None:
-            continue
-
-        # Usar solo deuda financiera (LT + ST), NO totalDebt si incluye pasivos operativos
-        # FMP: totalDebt = shortTermDebt + longTermDebt (deuda financiera solamente)
-        total_debt = balance.get("totalDebt")
-        short_debt = balance.get("shortTermDebt")
-        long_debt = balance.get("longTermDebt") or balance.get("longTermDebtTotal")
+    # Deuda financiera por fila, convertida en bloque. Usar solo deuda
+    # financiera (LT + ST): FMP define totalDebt = shortTermDebt + longTermDebt.
+    # Si totalDebt viene informado se usa tal cual (aunque no sea numérico).
+    total_debt = _numerico(balance_statements, "totalDebt")
+    short_debt = np.abs(_numerico(balance_statements, "shortTermDebt"))
+    long_debt = np.abs(_numerico(balance_statements, "longTermDebt", "longTermDebtTotal"))
+    componentes = np.where(
+        np.isnan(short_debt) & np.isnan(long_debt),
+        np.nan,
+        np.nan_to_num(short_debt) + np.nan_to_num(long_debt),
+    )
+    total_informado = np.fromiter(
+        (b.get("totalDebt") not in (None, "") for b in balance_statements),
+        dtype=bool,
+        count=len(balance_statements),
+    )
+    deudas = np.where(total_informado, np.abs(total_debt), componentes)
 
-        deuda_valor: Optional[float] = None
-        if total_debt not in (None, ""):
-            try:
-                deuda_valor = abs(float(total_debt))
-            except (TypeError, ValueError):
-                deuda_valor = None
-        else:
-            suma = 0.0
-            encontrado = False
-            for componente in (short_debt, long_debt):
-                if componente in (None, ""):
-                    continue
-                try:
-                    suma += abs(float(componente))
-                    encontrado = True
-                except (TypeError, ValueError):
-                    continue
-            if encontrado:
-                deuda_valor = suma
-
-        if deuda_valor is None or deuda_valor == 0:
+    balance_por_año: Dict[int, float] = {}
+    for año, deuda_valor in zip(map(_extraer_año, balance_statements), deudas.tolist()):
+        if año is None or deuda_valor != deuda_valor or deuda_valor == 0:  # NaN o cero
             continue
-
         balance_por_año[año] = deuda_valor
         if total_debt_total is None:
             total_debt_total = deuda_valor
@@ -514,63 +947,57 @@ def obtener_metricas_financieras(ticker: str, limite: int = 5) -> FMPDerivedMetr
     costo_por_año: Dict[int, float] = {}
     ebit_por_año: Dict[int, float] = {}
 
-    for income in income_statements:
-        año = _extraer_año(income)
+    impuestos = np.abs(_numerico(income_statements, "incomeTaxExpense"))
+    ingresos_pre = np.abs(_numerico(income_statements, "incomeBeforeTax", "incomeBeforeIncomeTaxes"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tasas = np.where(ingresos_pre != 0, impuestos / ingresos_pre, np.nan)
+    # Descarta NaN y valores claramente erróneos
+    tasas = np.where((tasas >= 0) & (tasas < 1.5), tasas, np.nan)
+    intereses = np.abs(
+        _numerico(income_statements, "interestExpense", "interestExpenseNonOperating", solo_vacios=True)
+    )
+    ebits = _numerico(income_statements, "operatingIncome", "ebit")
+    revenues = np.abs(_numerico(income_statements, "revenue", "totalRevenue"))
+
+    # Un solo recorrido del income: el año se extrae una vez por fila y la
+    # deuda del mismo año se cruza con una única búsqueda en balance_por_año
+    for año, tasa, interes_float, ebit_v, rev in zip(
+        map(_extraer_año, income_statements),
+        tasas.tolist(),
+        intereses.tolist(),
+        ebits.tolist(),
+        revenues.tolist(),
+    ):
         if año is None:
             continue
 
-        impuesto = income.get("incomeTaxExpense")
-        ingreso_pre_impuesto = income.get("incomeBeforeTax") or income.get("incomeBeforeIncomeTaxes")
-        try:
-            impuesto_float = abs(float(impuesto)) if impuesto not in (None, "") else None
-            ingreso_float = float(ingreso_pre_impuesto) if ingreso_pre_impuesto not in (None, "") else None
-        except (TypeError, ValueError):
-            impuesto_float = ingreso_float = None
-
-        if impuesto_float is not None and ingreso_float not in (None, 0):
-            tasa = impuesto_float / abs(ingreso_float)
-            if 0 <= tasa < 1.5:  # evita valores claramente erróneos
-                tasas_por_año[año] = tasa
-
-        interes = income.get("interestExpense")
-        if interes in (None, ""):
-            interes = income.get("interestExpenseNonOperating")
-
-        try:
-            interes_float = abs(float(interes)) if interes not in (None, "") else None
-        except (TypeError, ValueError):
-            interes_float = None
+        if tasa == tasa:
+            tasas_por_año[año] = tasa
 
         # EBIT para calcular interest coverage
-        ebit_raw = income.get("operatingIncome") or income.get("ebit")
-        try:
-            ebit_v = float(ebit_raw) if ebit_raw not in (None, "") else None
-        except (TypeError, ValueError):
-            ebit_v = None
-        if ebit_v is not None:
+        if ebit_v == ebit_v:
             ebit_por_año[año] = ebit_v
 
         # Revenue para detección de brazo financiero
-        rev_raw = income.get("revenue") or income.get("totalRevenue")
-        if rev_raw not in (None, "") and revenue_total is None:
-            try:
-                revenue_total = abs(float(rev_raw))
-            except (TypeError, ValueError):
-                pass
+        if revenue_total is None and rev == rev:
+            revenue_total = rev
 
         deuda = balance_por_año.get(año)
-        if interes_float is not None and deuda:
+        if interes_float == interes_float and deuda:
             kd = _calcular_kd_con_floor(
                 interes_float=interes_float,
                 deuda_financiera=deuda,
                 rf=rf,
-                ebit_por_año={año: ebit_por_año[año]} if año in ebit_por_año else None,
+                ebit_por_año={año: ebit_año} if (ebit_año := ebit_por_año.get(año)) is not None else None,
                 revenue_total=revenue_total,
                 total_debt_total=total_debt_total,
             )
             if kd is not None and kd >= 0:
                 costo_por_año[año] = kd
 
+    if ratios:
+        tasas_por_año.update(_tasas_desde_ratios(ratios))
+
     tasa_promedio = None
     if tasas_por_año:
         tasa_promedio = sum(tasas_por_año.values()) / len(tasas_por_año)
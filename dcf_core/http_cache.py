@@ -0,0 +1,109 @@
+"""Caché en disco con TTL para respuestas JSON de APIs externas.
+
+Cada entrada se guarda como ``{"timestamp": ..., "payload": ...}`` en
+``<DCF_CACHE_DIR>/<namespace>/<md5(url + params)>.json``. Las credenciales
+(api_key, token, ...) se excluyen de la clave para no escribirlas en disco.
+
+Variables de entorno:
+  - DCF_CACHE_DIR: directorio raíz (por defecto ~/.cache/dcf).
+  - DCF_CACHE_DISABLE=1: desactiva lectura y escritura (siempre va a la red).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Mapping, Optional
+
+_PARAMS_SECRETOS = frozenset({"api_key", "apikey", "api_token", "token"})
+
+
+def _directorio_base() -> Path:
+    raiz = os.environ.get("DCF_CACHE_DIR", "").strip()
+    return Path(raiz) if raiz else Path.home() / ".cache" / "dcf"
+
+
+def cache_deshabilitado() -> bool:
+    return os.environ.get("DCF_CACHE_DISABLE", "").strip().lower() in ("1", "true", "yes")
+
+
+class FileCache:
+    """Caché JSON en disco para un endpoint (namespace) concreto."""
+
+    def __init__(self, namespace: str, root: Optional[Path] = None) -> None:
+        self._namespace = namespace
+        self._root = root
+
+    @property
+    def directorio(self) -> Path:
+        return (self._root or _directorio_base()) / self._namespace
+
+    @staticmethod
+    def clave(url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        limpios = {k: v for k, v in (params or {}).items() if k not in _PARAMS_SECRETOS}
+        texto = json.dumps({"url": url, "params": limpios}, sort_keys=True, default=str)
+        return hashlib.md5(texto.encode()).hexdigest()
+
+    def _ruta(self, url: str, params: Optional[Mapping[str, Any]]) -> Path:
+        return self.directorio / f"{self.clave(url, params)}.json"
+
+    def get(self, url: str, params: Optional[Mapping[str, Any]], ttl_seconds: float) -> Optional[Any]:
+        """Devuelve el payload guardado si existe y no venció; None en otro caso."""
+        if cache_deshabilitado():
+            return None
+        try:
+            with open(self._ruta(url, params), "r", encoding="utf-8") as fh:
+                entrada = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entrada, dict) or "payload" not in entrada:
+            return None
+        try:
+            vigente = time.time() - float(entrada["timestamp"]) < ttl_seconds
+        except (KeyError, TypeError, ValueError):
+            return None
+        return entrada["payload"] if vigente else None
+
+    def set(self, url: str, params: Optional[Mapping[str, Any]], payload: Any) -> None:
+        """Escribe el payload de forma atómica (archivo temporal + os.replace)."""
+        if cache_deshabilitado():
+            return
+        ruta = self._ruta(url, params)
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump({"timestamp": time.time(), "payload": payload}, fh)
+                os.replace(tmp, ruta)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except (OSError, TypeError, ValueError):
+            # Un fallo de escritura no debe romper el análisis: solo se pierde el caché
+            pass
+
+    def get_or_fetch(
+        self,
+        url: str,
+        params: Optional[Mapping[str, Any]],
+        ttl_seconds: float,
+        fetch: Callable[[], Any],
+    ) -> Any:
+        """Devuelve el payload cacheado o ejecuta ``fetch`` y guarda su resultado.
+
+        Las excepciones de ``fetch`` se propagan y no se cachean.
+        """
+        cacheado = self.get(url, params, ttl_seconds)
+        if cacheado is not None:
+            return cacheado
+        payload = fetch()
+        self.set(url, params, payload)
+        return payload
@@ -5,18 +5,45 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence
 
 import requests
 
-from .utils import parse_datetime_iso
+from .utils import (
+    cargar_json,
+    crear_sesion_http,
+    fragmento_error,
+    parse_datetime_iso,
+    primer_valor,
+)
+
+
+# Máximo de símbolos por petición en modo batch
+_BATCH_SYMBOLS = 20
+
+_NEWS_URL = "https://api.marketaux.com/v1/news/all"
+
+# Campo principal seguido de sus alternativas, en orden de preferencia
+_URL_KEYS = ("url", "article_url")
+_SOURCE_KEYS = ("title", "name", "domain")
+_SUMMARY_KEYS = ("description", "summary", "snippet", "content")
+_IMAGE_KEYS = ("image_url", "image_url_small", "image")
+_DATE_KEYS = ("published_at", "created_at")
+# Sesión compartida: reutiliza la conexión TLS entre consultas y reintenta
+# 429/5xx transitorios con backoff exponencial (la espera queda acotada a 30s)
+_SESSION = crear_sesion_http(
+    pool_connections=4,
+    pool_maxsize=16,
+    backoff_factor=1.0,
+    headers={"User-Agent": "DCFApp/1.0", "Accept": "application/json"},
+)
 
 
 class MarketauxError(RuntimeError):
     """Raised when Marketaux cannot fulfill a request."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketauxNewsItem:
     """Represents a single Marketaux news article."""
 
@@ -38,96 +65,146 @@ def _get_api_key() -> str:
 
 
 
-def obtener_noticias_marketaux(ticker: str, limite: int = 6) -> List[MarketauxNewsItem]:
-    """Fetches recent Marketaux news for the provided ticker symbol."""
-
-    ticker = (ticker or "").upper().strip()
-    if not ticker:
-        raise MarketauxError("El ticker proporcionado no es válido.")
-
-    api_key = _get_api_key()
-    lim = max(1, min(int(limite or 6), 50))
-
-    params = {
-        "symbols": ticker,
-        "filter_entities": "true",
-        "sort": "published_at:desc",
-        "limit": str(lim),
-        "language": "en,es",
-        "api_token": api_key,
-    }
+def _solicitar_noticias(params: dict) -> list:
+    """Ejecuta la consulta a Marketaux y devuelve la lista cruda de artículos."""
 
-    url = "https://api.marketaux.com/v1/news/all"
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = _SESSION.get(_NEWS_URL, params=params, timeout=15)
     except requests.RequestException as exc:  # pragma: no cover - dependiente de la red
         raise MarketauxError(f"No se pudieron obtener noticias de Marketaux ({exc}).") from exc
 
     if response.status_code == 401:
         raise MarketauxError("Marketaux devolvió 401 (token inválido o expirado). Verificá MARKETAUX_API_KEY.")
 
+    # Con raise_on_status=False solo llega un 429 cuando ya se agotaron los reintentos
     if response.status_code == 429:
         raise MarketauxError("Marketaux devolvió 429 (límite de peticiones superado). Intenta nuevamente más tarde.")
 
     if response.status_code != 200:
-        snippet = response.text.strip().replace("\n", " ")[:200]
+        snippet = fragmento_error(response)
         raise MarketauxError(f"Marketaux devolvió un error inesperado ({response.status_code}: {snippet}).")
 
     try:
-        payload = response.json()
+        payload = cargar_json(response.content)
     except ValueError as exc:  # pragma: no cover - depends on provider
         raise MarketauxError("Marketaux devolvió un cuerpo no válido al solicitar noticias.") from exc
 
     data = payload.get("data")
     if not isinstance(data, list):
         raise MarketauxError("Marketaux devolvió un formato inesperado para las noticias.")
+    return data
 
-    items: List[MarketauxNewsItem] = []
-    for entry in data:
-        if not isinstance(entry, dict):
-            continue
-
-        title = (entry.get("title") or "").strip()
-        url_art = (entry.get("url") or entry.get("article_url") or "").strip()
-        if not title or not url_art:
-            continue
-
-        fuente_raw = entry.get("source")
-        if isinstance(fuente_raw, dict):
-            source = (fuente_raw.get("title") or fuente_raw.get("name") or fuente_raw.get("domain") or "").strip() or None
-        else:
-            source = (str(fuente_raw or "").strip() or None)
-
-        resumen = (
-            entry.get("description")
-            or entry.get("summary")
-            or entry.get("snippet")
-            or entry.get("content")
-        )
-        summary = str(resumen).strip() if resumen else None
 
-        imagen = (
-            entry.get("image_url")
-            or entry.get("image_url_small")
-            or entry.get("image")
-        )
-        image = str(imagen).strip() if imagen else None
-
-        published = parse_datetime_iso(entry.get("published_at") or entry.get("created_at"))
-
-        items.append(
-            MarketauxNewsItem(
-                title=title,
-                source=source,
-                summary=summary,
-                url=url_art,
-                image=image,
-                published_at=published,
-            )
-        )
+def _parse_source(fuente_raw) -> Optional[str]:
+    if isinstance(fuente_raw, dict):
+        return (primer_valor(fuente_raw, _SOURCE_KEYS) or "").strip() or None
+    return str(fuente_raw or "").strip() or None
+
+
+def _parse_entry(entry) -> Optional[MarketauxNewsItem]:
+    if not isinstance(entry, dict):
+        return None
+
+    title = (entry.get("title") or "").strip()
+    url_art = (primer_valor(entry, _URL_KEYS) or "").strip()
+    if not title or not url_art:
+        return None
+
+    resumen = primer_valor(entry, _SUMMARY_KEYS)
+    imagen = primer_valor(entry, _IMAGE_KEYS)
+
+    return MarketauxNewsItem(
+        title=title,
+        source=_parse_source(entry.get("source")),
+        summary=str(resumen).strip() if resumen else None,
+        url=url_art,
+        image=str(imagen).strip() if imagen else None,
+        published_at=parse_datetime_iso(primer_valor(entry, _DATE_KEYS)),
+    )
+
 
-    items.sort(key=lambda n: (n.published_at is None, n.published_at and -n.published_at.timestamp()))
+def _sort_key(item: MarketauxNewsItem) -> tuple[bool, float]:
+    # Clave homogénea (bool, float): más reciente primero y sin fecha al final
+    publicado = item.published_at
+    return (True, 0.0) if publicado is None else (False, -publicado.timestamp())
+
+
+def _ordenar_y_limitar(items: List[MarketauxNewsItem], lim: int) -> List[MarketauxNewsItem]:
+    items.sort(key=_sort_key)
     if lim and len(items) > lim:
         items = items[:lim]
     return items
 
+
+def obtener_noticias_marketaux(ticker: str, limite: int = 6) -> List[MarketauxNewsItem]:
+    """Fetches recent Marketaux news for the provided ticker symbol."""
+
+    ticker = (ticker or "").upper().strip()
+    if not ticker:
+        raise MarketauxError("El ticker proporcionado no es válido.")
+
+    api_key = _get_api_key()
+    lim = max(1, min(int(limite or 6), 50))
+
+    params = {
+        "symbols": ticker,
+        "filter_entities": "true",
+        "sort": "published_at:desc",
+        "limit": str(lim),
+        "language": "en,es",
+        "api_token": api_key,
+    }
+
+    items: List[MarketauxNewsItem] = []
+    for entry in _solicitar_noticias(params):
+        item = _parse_entry(entry)
+        if item is not None:
+            items.append(item)
+
+    return _ordenar_y_limitar(items, lim)
+
+
+def obtener_noticias_marketaux_batch(
+    tickers: Sequence[str], limite: int = 6
+) -> Dict[str, List[MarketauxNewsItem]]:
+    """Noticias de varios tickers con una petición por cada bloque de símbolos.
+
+    Marketaux acepta ``symbols=AAPL,MSFT,...``; cada artículo trae en ``entities``
+    los símbolos que menciona, lo que permite repartirlo entre los tickers
+    pedidos. Devuelve un dict ticker → lista (vacía si no hubo noticias).
+    """
+
+    simbolos = list(dict.fromkeys(
+        t for t in ((ticker or "").upper().strip() for ticker in tickers) if t
+    ))
+    if not simbolos:
+        return {}
+
+    api_key = _get_api_key()
+    lim = max(1, min(int(limite or 6), 50))
+    por_ticker: Dict[str, List[MarketauxNewsItem]] = {t: [] for t in simbolos}
+
+    for inicio in range(0, len(simbolos), _BATCH_SYMBOLS):
+        bloque = simbolos[inicio:inicio + _BATCH_SYMBOLS]
+        params = {
+            "symbols": ",".join(bloque),
+            "filter_entities": "true",
+            "sort": "published_at:desc",
+            "limit": "50",
+            "language": "en,es",
+            "api_token": api_key,
+        }
+        for entry in _solicitar_noticias(params):
+            item = _parse_entry(entry)
+            if item is None:
+                continue
+            mencionados = {
+                str(entidad.get("symbol") or "").upper()
+                for entidad in (entry.get("entities") or [])
+                if isinstance(entidad, dict)
+            }
+            for ticker in bloque:
+                if ticker in mencionados:
+                    por_ticker[ticker].append(item)
+
+    return {ticker: _ordenar_y_limitar(items, lim) for ticker, items in por_ticker.items()}
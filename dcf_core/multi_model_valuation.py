@@ -12,6 +12,7 @@ ya presentes en el dict `financials` (resultado de analizar_empresa()).
 
 from __future__ import annotations
 
+import logging
 import math
 from typing import Optional
 
@@ -25,6 +26,8 @@ try:
 except ImportError:
     _HAS_SCIPY = False
 
+logger = logging.getLogger(__name__)
+
 
 # ---------------------------------------------------------------------------
 # Ratios sectoriales por defecto
@@ -1385,12 +1388,10 @@ def run_all_models(
         # cuando el fallback asigna peso a modelos que la etapa marca como
         # "No útil" (peso_raw=0) por falta de alternativas suficientes.
         if relevancia == "No útil" and peso_final > 0:
-            import sys as _sys_mmv
-            print(
+            logger.warning(
                 f"[multi_model WARN] inconsistencia en '{key}': "
                 f"peso_final={peso_final:.2%} pero peso_raw={peso_raw} "
-                f"→ relevancia corregida a 'Algo útil' (fallback por pocos modelos)",
-                file=_sys_mmv.stderr,
+                f"→ relevancia corregida a 'Algo útil' (fallback por pocos modelos)"
             )
             relevancia = "Algo útil"
 
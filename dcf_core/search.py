@@ -2,14 +2,37 @@
 
 from __future__ import annotations
 
+import functools
 import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from functools import lru_cache
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import requests
 
 from .fmp import FMPClient, FMPClientError, FMPSearchResult
+from .utils import cargar_json, crear_sesion_http, ttl_cache
+
+_YAHOO_SEARCH_URL = "https://query1.finance.yahoo.com/v1/finance/search"
+# Yahoo responde 429 ante ráfagas: no se reintenta y se pasa al índice local
+_YAHOO_SESSION = crear_sesion_http(
+    pool_connections=4,
+    pool_maxsize=16,
+    status_forcelist=(500, 502, 503, 504),
+    headers={
+        "User-Agent": "Mozilla/5.0 (compatible; DCFApp/1.0)",
+        "Accept": "application/json",
+    },
+)
+_YAHOO_SEARCH_TIMEOUT = 8
+# El autocompletado no reintenta FMP: un intento de (conexión, lectura) entra
+# completo en la espera de search_companies y el hilo queda libre al vencer
+_FMP_SEARCH_HTTP_TIMEOUT = (3, 6)
+_FMP_SEARCH_TIMEOUT = sum(_FMP_SEARCH_HTTP_TIMEOUT) + 1
+# Si FMP no respondió en este plazo se lanza Yahoo en paralelo
+_FMP_SEARCH_HEDGE = 1.0
+# Pool compartido para lanzar FMP y Yahoo sin crear hilos por búsqueda
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dcf-search")
 
 
 @dataclass(frozen=True)
@@ -31,9 +54,12 @@ def _from_fmp_result(item: FMPSearchResult) -> CompanySearchResult:
     )
 
 
-@lru_cache(maxsize=1)
-def _local_company_index() -> List[CompanySearchResult]:
-    """Static fallback so the UI keeps working without external APIs."""
+def _local_company_index() -> Tuple[Tuple[CompanySearchResult, str, str, str], ...]:
+    """Static fallback so the UI keeps working without external APIs.
+
+    Each entry carries its symbol, name and exchange already lowercased so the
+    autocomplete filter does not re-lower the index on every keystroke.
+    """
 
     raw_companies = (
         ("AAPL", "Apple Inc.", "NASDAQ"),
@@ -69,15 +95,44 @@ def _local_company_index() -> List[CompanySearchResult]:
         ("SHOP", "Shopify Inc.", "NYSE"),
     )
 
-    return [
-        CompanySearchResult(symbol=symbol, name=name, exchange=exchange, asset_type=None)
+    return tuple(
+        (
+            CompanySearchResult(symbol=symbol, name=name, exchange=exchange, asset_type=None),
+            symbol.lower(),
+            name.lower(),
+            exchange.lower(),
+        )
         for symbol, name, exchange in raw_companies
-    ]
+    )
+
+
+def _prefix_index(
+    indexed: Tuple[Tuple[CompanySearchResult, str, str, str], ...]
+) -> Dict[str, Tuple[int, ...]]:
+    """Map every 1- and 2-character substring of the lowered fields to entry positions.
 
+    Any entry containing the query also contains its first two characters, so
+    the positions under ``query[:2]`` are a superset of the matches.
+    """
+    posiciones: Dict[str, List[int]] = {}
+    for pos, (_, *campos) in enumerate(indexed):
+        fragmentos = set()
+        for campo in campos:
+            fragmentos.update(campo)
+            fragmentos.update(campo[i:i + 2] for i in range(len(campo) - 1))
+        for fragmento in fragmentos:
+            posiciones.setdefault(fragmento, []).append(pos)
+    return {fragmento: tuple(lista) for fragmento, lista in posiciones.items()}
 
-def _filter_results(results: Iterable[CompanySearchResult], query: str) -> List[CompanySearchResult]:
+
+_LOCAL_INDEX = _local_company_index()
+_LOCAL_PREFIX_IDX = _prefix_index(_LOCAL_INDEX)
+
+
+def _filter_results(results: Iterable, query: str) -> list:
+    """Filtra resultados con atributos symbol/name/exchange y deduplica por símbolo."""
     query_lower = query.lower()
-    filtered: List[CompanySearchResult] = []
+    filtered: list = []
     seen = set()
 
     for item in results:
@@ -101,8 +156,24 @@ def _filter_results(results: Iterable[CompanySearchResult], query: str) -> List[
     return filtered
 
 
+def _filter_indexed(
+    indexed: Iterable[Tuple[CompanySearchResult, str, str, str]], query: str
+) -> List[CompanySearchResult]:
+    """Same as ``_filter_results`` for entries with pre-lowered fields and upper symbols."""
+    query_lower = query.lower()
+    filtered: List[CompanySearchResult] = []
+    seen = set()
+
+    for item, symbol, name, exchange in indexed:
+        if query_lower in symbol or query_lower in name or query_lower in exchange:
+            if item.symbol not in seen:
+                filtered.append(item)
+                seen.add(item.symbol)
+
+    return filtered
+
+
 def _search_with_yahoo(query: str, limit: int) -> List[CompanySearchResult]:
-    url = "https://query1.finance.yahoo.com/v1/finance/search"
     params = {
         "q": query,
         "quotesCount": limit,
@@ -111,25 +182,24 @@ def _search_with_yahoo(query: str, limit: int) -> List[CompanySearchResult]:
     }
 
     try:
-        response = requests.get(
-            url,
-            params=params,
-            timeout=8,
-            headers={"User-Agent": "Mozilla/5.0 (compatible; DCFApp/1.0)"},
-        )
+        response = _YAHOO_SESSION.get(_YAHOO_SEARCH_URL, params=params, timeout=_YAHOO_SEARCH_TIMEOUT)
         response.raise_for_status()
     except requests.RequestException:
         return []
 
     try:
-        payload = response.json()
+        payload = cargar_json(response.content)
     except ValueError:
         return []
 
+    # Construcción y filtrado en una sola pasada sobre el JSON
+    query_lower = query.lower()
     results: List[CompanySearchResult] = []
+    seen = set()
     for quote in payload.get("quotes", [])[:limit]:
         symbol = (quote.get("symbol") or "").strip()
-        if not symbol:
+        symbol_upper = symbol.upper()
+        if not symbol or symbol_upper in seen:
             continue
 
         name = (
@@ -139,26 +209,78 @@ def _search_with_yahoo(query: str, limit: int) -> List[CompanySearchResult]:
             or symbol
         )
         exchange = quote.get("exchDisp") or quote.get("exchangeShortName")
-        asset_type = quote.get("quoteType") or quote.get("typeDisp")
+        if not (
+            query_lower in symbol.lower()
+            or query_lower in name.lower()
+            or query_lower in (exchange or "").lower()
+        ):
+            continue
 
+        seen.add(symbol_upper)
         results.append(
             CompanySearchResult(
-                symbol=symbol.upper(),
+                symbol=symbol_upper,
                 name=name,
                 exchange=exchange,
-                asset_type=asset_type,
+                asset_type=quote.get("quoteType") or quote.get("typeDisp"),
             )
         )
 
-    return _filter_results(results, query)
+    return results
 
 
 def _search_locally(query: str) -> List[CompanySearchResult]:
-    return _filter_results(_local_company_index(), query)
+    clave = query.lower()[:2]
+    if not clave:
+        return _filter_indexed(_LOCAL_INDEX, query)
+    candidatos = _LOCAL_PREFIX_IDX.get(clave, ())
+    return _filter_indexed((_LOCAL_INDEX[pos] for pos in candidatos), query)
+
+
+@functools.lru_cache(maxsize=2)
+def _fmp_search_client(api_key: str) -> FMPClient:
+    # Session propia sin reintentos; el memo y el caché en disco son los del
+    # resto de FMP porque son por clase/endpoint y no por cliente
+    session = crear_sesion_http(
+        pool_connections=2,
+        pool_maxsize=8,
+        total_reintentos=0,
+        headers={"User-Agent": "dcf-core/1.0"},
+    )
+    return FMPClient(api_key=api_key, session=session, timeout=_FMP_SEARCH_HTTP_TIMEOUT)
 
 
+def _search_with_fmp(query: str, limit: int) -> List[CompanySearchResult]:
+    try:
+        cliente = _fmp_search_client(os.environ.get("FMP_API_KEY", ""))
+        # Consulta en minúsculas: una sola entrada de memo/caché por prefijo
+        resultados_fmp = cliente.search_companies(query.lower(), limit=limit)
+    except FMPClientError:
+        return []
+    # Se filtra sobre los FMPSearchResult y solo se convierten las coincidencias
+    return [_from_fmp_result(item) for item in _filter_results(resultados_fmp, query)]
+
+
+def _resultado_o_vacio(futuro: Optional[Future], timeout: float) -> List[CompanySearchResult]:
+    if futuro is None:
+        return []
+    try:
+        return futuro.result(timeout=timeout)
+    except Exception:
+        return []
+
+
+@ttl_cache(
+    maxsize=256,
+    ttl=60,
+    clave=lambda query, limit=8: ((query or "").strip().lower(), max(1, min(limit, 20))),
+)
 def search_companies(query: str, limit: int = 8) -> List[CompanySearchResult]:
-    """Return company matches using FMP when possible, otherwise fall back to Yahoo search."""
+    """Return company matches using FMP when possible, otherwise fall back to Yahoo search.
+
+    Yahoo se lanza si FMP no trae coincidencias o, en paralelo, si FMP no
+    respondió dentro de _FMP_SEARCH_HEDGE segundos.
+    """
 
     cleaned_query = query.strip()
     if not cleaned_query:
@@ -166,25 +288,34 @@ def search_companies(query: str, limit: int = 8) -> List[CompanySearchResult]:
 
     normalized_limit = max(1, min(limit, 20))
 
-    resultados: List[CompanySearchResult] = []
-    api_key = os.environ.get("FMP_API_KEY")
-
-    if api_key:
-        try:
-            cliente = FMPClient(api_key=api_key)
-            resultados_fmp = cliente.search_companies(cleaned_query, limit=normalized_limit * 2)
-            resultados.extend(_from_fmp_result(item) for item in resultados_fmp)
-        except FMPClientError:
-            resultados = []
-    else:
-        # Evita levantar una excepción cada vez que falta la API key
-        resultados = []
-
-    filtrados = _filter_results(resultados, cleaned_query)
-    if filtrados:
-        return filtrados[:normalized_limit]
-
-    yahoo = _search_with_yahoo(cleaned_query, limit=normalized_limit * 2)
+    # Sin API key no se consulta FMP (evita levantar una excepción cada vez)
+    futuro_fmp = (
+        _SEARCH_EXECUTOR.submit(_search_with_fmp, cleaned_query, normalized_limit * 2)
+        if os.environ.get("FMP_API_KEY")
+        else None
+    )
+
+    # FMP es la fuente preferida y suele responder desde el memo o el caché en
+    # disco: Yahoo solo se consulta si FMP no trae nada o tarda más de
+    # _FMP_SEARCH_HEDGE, en cuyo caso corre en paralelo mientras se espera a FMP
+    futuro_yahoo: Optional[Future] = None
+    if futuro_fmp is not None:
+        hecho, _ = wait([futuro_fmp], timeout=_FMP_SEARCH_HEDGE)
+        if not hecho:
+            futuro_yahoo = _SEARCH_EXECUTOR.submit(
+                _search_with_yahoo, cleaned_query, normalized_limit * 2
+            )
+        filtrados = _resultado_o_vacio(futuro_fmp, _FMP_SEARCH_TIMEOUT - _FMP_SEARCH_HEDGE)
+        if filtrados:
+            if futuro_yahoo is not None:
+                futuro_yahoo.cancel()
+            return filtrados[:normalized_limit]
+
+    if futuro_yahoo is None:
+        futuro_yahoo = _SEARCH_EXECUTOR.submit(
+            _search_with_yahoo, cleaned_query, normalized_limit * 2
+        )
+    yahoo = _resultado_o_vacio(futuro_yahoo, _YAHOO_SEARCH_TIMEOUT)
     if yahoo:
         return yahoo[:normalized_limit]
 
@@ -2,8 +2,20 @@
 
 from __future__ import annotations
 
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+# orjson es opcional: parsea JSON varias veces más rápido que la stdlib
+try:
+    import orjson as _orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
 
 
 # ---------------------------------------------------------------------------
@@ -31,6 +43,199 @@ def es_sector_financiero(sector: str, industria: str = "") -> bool:
     return any(kw in industria_lower for kw in _INDUSTRIAS_FINANCIERAS_KW)
 
 
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+_RETRY_STATUS: tuple[int, ...] = (429, 500, 502, 503, 504)
+
+
+@functools.lru_cache(maxsize=1)
+def _clase_retry():
+    """Retry de urllib3 que no espera más de ``backoff_max`` aunque Retry-After pida más.
+
+    Un 429 por cuota diaria puede traer un Retry-After de horas: se acota para
+    que el worker no quede bloqueado y el cliente reporte el error.
+    """
+    from urllib3.util.retry import Retry
+
+    class RetryAcotado(Retry):
+        def get_retry_after(self, response):
+            espera = super().get_retry_after(response)
+            return None if espera is None else min(espera, self.backoff_max)
+
+    return RetryAcotado
+
+
+def crear_sesion_http(
+    pool_maxsize: int = 20,
+    pool_connections: int = 10,
+    total_reintentos: int = 3,
+    backoff_factor: float = 0.3,
+    backoff_jitter: float = 0.5,
+    backoff_max: float = 30.0,
+    status_forcelist: Iterable[int] = _RETRY_STATUS,
+    reintentos_conexion: Optional[int] = None,
+    reintentos_lectura: Optional[int] = None,
+    headers: Optional[dict] = None,
+):
+    """Crea una ``requests.Session`` con pool keep-alive y reintentos.
+
+    Con ``raise_on_status=False`` agotar los reintentos devuelve la última
+    respuesta, así cada cliente sigue traduciendo 401/429/5xx a su propio error.
+    Solo se reintentan GET; la espera es exponencial con jitter
+    (``backoff_factor * 2**n + U(0, backoff_jitter)``, tope ``backoff_max``) y
+    se respeta ``Retry-After`` en 429/503 con ese mismo tope.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    reintentos = _clase_retry()(
+        total=total_reintentos,
+        connect=reintentos_conexion,
+        read=reintentos_lectura,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        backoff_max=backoff_max,
+        status_forcelist=tuple(status_forcelist),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=reintentos,
+    )
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def cargar_json(contenido: bytes) -> Any:
+    """Decodifica un cuerpo JSON con orjson si está disponible.
+
+    Ambas ramas levantan una subclase de ValueError ante JSON inválido.
+    """
+    if _HAS_ORJSON:
+        return _orjson.loads(contenido)
+    return json.loads(contenido)
+
+
+def fragmento_error(response, limite: int = 200) -> str:
+    """Primeros caracteres del cuerpo de una respuesta de error, en una línea.
+
+    Lee a lo sumo 512 bytes (sin consumir el resto si la respuesta es en
+    streaming) y los decodifica como UTF-8 sin la detección de charset que
+    hace ``response.text`` sobre el cuerpo completo.
+    """
+    import requests
+
+    try:
+        crudo = next(response.iter_content(512), b"")
+    except (requests.RequestException, AttributeError, StopIteration):
+        # Cuerpo ya consumido/cerrado o conexión cortada: el mensaje sale sin fragmento
+        return ""
+    if isinstance(crudo, str):
+        crudo = crudo.encode("utf-8", errors="replace")
+    texto = crudo[:512].decode("utf-8", errors="replace")
+    return texto.strip().replace("\n", " ")[:limite]
+
+
+# ---------------------------------------------------------------------------
+# Caché en memoria
+# ---------------------------------------------------------------------------
+
+class CacheTTL:
+    """Diccionario en memoria con vencimiento por ``ttl`` y desalojo LRU sobre ``maxsize``.
+
+    Seguro entre hilos. ``get`` devuelve ``None`` si la clave falta o venció
+    (las entradas vencidas se eliminan al consultarlas).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entradas: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave: Hashable) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if time.monotonic() - entrada[0] >= self.ttl:
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+
+    def set(self, clave: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._entradas[clave] = (time.monotonic(), valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maxsize:
+                self._entradas.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+def ttl_cache(
+    maxsize: int = 256,
+    ttl: float = 60.0,
+    clave: Optional[Callable[..., Hashable]] = None,
+):
+    """Memoiza una función por ``ttl`` segundos con desalojo LRU sobre ``maxsize``.
+
+    ``clave`` recibe los mismos argumentos que la función y devuelve la clave
+    normalizada (p.ej. ticker en mayúsculas). Las listas se guardan como tuplas
+    y cada llamada recibe una lista nueva, así el llamador puede modificarla sin
+    tocar el caché. Las excepciones no se cachean. Expone ``cache_clear()``.
+    """
+
+    def decorador(func):
+        entradas = CacheTTL(maxsize=maxsize, ttl=ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            k = clave(*args, **kwargs) if clave else (args, tuple(sorted(kwargs.items())))
+            entrada = entradas.get(k)
+            if entrada is not None:
+                valor, es_lista = entrada
+                return list(valor) if es_lista else valor
+
+            valor = func(*args, **kwargs)
+            es_lista = isinstance(valor, list)
+            entradas.set(k, (tuple(valor) if es_lista else valor, es_lista))
+            return list(valor) if es_lista else valor
+
+        wrapper.cache_clear = entradas.clear
+        return wrapper
+
+    return decorador
+
+
+# ---------------------------------------------------------------------------
+# Parseo de respuestas de APIs
+# ---------------------------------------------------------------------------
+
+def primer_valor(datos: dict, claves: Iterable[str]) -> Any:
+    """Primer valor truthy entre ``claves`` (clave principal y alternativas), o None."""
+    for clave in claves:
+        valor = datos.get(clave)
+        if valor:
+            return valor
+    return None
+
+
 def parse_datetime_epoch(epoch_seconds: Optional[int]) -> Optional[datetime]:
     """Convierte un timestamp Unix (segundos) a datetime con zona UTC."""
     if not epoch_seconds:
@@ -48,7 +253,13 @@ def parse_datetime_iso(value: Optional[str]) -> Optional[datetime]:
     value = value.strip()
     if not value:
         return None
+    return _parse_iso_cached(value)
+
 
+@functools.lru_cache(maxsize=1024)
+def _parse_iso_cached(value: str) -> Optional[datetime]:
+    # Las APIs de noticias repiten el mismo published_at entre páginas y
+    # consultas; datetime es inmutable, así que el resultado se puede compartir
     normalized = value.replace("Z", "+00:00") if value.endswith("Z") else value
     try:
         parsed = datetime.fromisoformat(normalized)